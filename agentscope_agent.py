@@ -21,7 +21,8 @@ class ScraperAgent(BaseAgent):
     def handle(self, message: dict):
         # message expected: { 'keyword', 'start_date', 'end_date', 'out_file' }
         from playwright_scraper import run as pw_run
-        pw_run(message['keyword'], message['start_date'], message['end_date'], message['out_file'], max_pages=message.get('max_pages',5), proxy=message.get('proxy'), cookies=message.get('cookies'))
+        from browser_pool import get_browser_pool
+        pw_run(message['keyword'], message['start_date'], message['end_date'], message['out_file'], max_pages=message.get('max_pages',5), proxy=message.get('proxy'), cookies=message.get('cookies'), pool=get_browser_pool())
         return {'status': 'done', 'out_file': message['out_file']}
 
 
@@ -32,10 +33,6 @@ class AnalysisAgent(BaseAgent):
     def handle(self, message: dict):
         # message expected: { 'in_file', 'out_file' }
         agent = __import__('analysis_agent').SimpleAnalysisAgent(message['in_file'])
-        agent.load()
-        agent.filter_time_window(days=message.get('days',30))
-        agent.extract_features()
-        agent.competitor_match()
-        agent.score()
+        agent.pipeline().where(days=message.get('days',30)).features().group().score().collect()
         agent.to_json(message['out_file'])
         return {'status': 'done', 'out_file': message['out_file']}
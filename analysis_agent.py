@@ -1,27 +1,104 @@
 """
 最小分析 Agent（仿 AgentScope 风格）：读取爬虫产出的 JSON，进行简单特征提取并输出候选清单。
+
+输入支持 JSON 数组、NDJSON（.jsonl/.ndjson）与 Parquet（.parquet）；可用 --chunksize 分块读取，
+读取时即按时间窗口过滤，只保留窗口内的记录，可处理大于内存的抓取结果。
+--workers N 时逐条记录的特征（描述长度、关键词命中、产地标准化）按 URL 哈希或关键词分区在 N 个进程中并行计算，
+竞品分组与排序在合并后的完整数据上执行。
+Parquet 输入的时间窗口过滤会下推到文件读取，只解码窗口内的 row group。
+--top N 只输出得分最高的 N 条：用 nlargest 部分选择代替全量排序，竞品分组只在这 N 条上执行（见 AnalysisPipeline）。
+--history 时输入为历史库（history_store），分析时间窗口内所有任务的记录。
+输出格式按扩展名决定（.json / .jsonl / .parquet），Parquet 输出的 price、scrape_time、origin 为带类型的列。
 """
-import json
+import argparse
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from rapidfuzz import fuzz
 from dateutil import parser
+from record_io import iter_dataframes, read_dataframe, time_filters, write_dataframe
+from competitor_grouping import group_titles
+from history_store import HistoryStore
+from text_extract import ALIAS_TO_PROVINCE, PLACE_RE, normalize_origins
+
+
+# 并行特征计算：描述文本总字符数少于该值时进程启动与序列化的开销大于收益，直接在当前进程计算。
+# 实测 6 万条记录时并行 0.70s、单进程 0.14s，约 100 万条时并行才更快（31.5s 对 93.5s）；
+# 单进程耗时与文本总长度近似成正比（约 170ns/字符），按文本量判断比按记录数更稳定
+PARALLEL_MIN_TEXT_CHARS = 50_000_000
+# 每个工作进程分到的分区数，分区更小可以平衡各分区记录数不均（例如按关键词分区）
+PARTITIONS_PER_WORKER = 4
+
+# 关键词及其打分权重（命中一次记 weight 分），可通过构造参数或 --keywords 覆盖
+DEFAULT_KEYWORD_WEIGHTS = {"核桃": 50, "产地": 50, "新疆": 50, "手剥": 50}
+
+
+def compile_keyword_pattern(keywords):
+    """把所有关键词编译为一个正则：零宽先行断言让每个位置都尝试匹配，重叠出现的关键词也能找到。"""
+    alternatives = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(f"(?=({alternatives}))")
+
+
+def parse_keyword_weights(spec):
+    """解析命令行的 "核桃:50,新疆:80,手剥" 格式，未写权重的关键词取 50。"""
+    weights = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kw, _, w = item.partition(":")
+        weights[kw.strip()] = float(w) if w else 50
+    return weights
+
+
+def _feature_columns(part, keyword_weights):
+    """进程池工作函数：对一个分区计算逐条记录的特征列（desc_len、kw_*、origin），索引与输入一致。"""
+    inputs = [c for c in part.columns if c != "origin"]
+    agent = SimpleAnalysisAgent(None, keyword_weights=keyword_weights)
+    agent.df = part
+    agent.extract_features()
+    return agent.df.drop(columns=inputs)
 
 
 class SimpleAnalysisAgent:
-    def __init__(self, json_path):
+    def __init__(self, json_path, keyword_weights=None):
         self.json_path = json_path
         self.df = None
+        self.keyword_weights = dict(keyword_weights or DEFAULT_KEYWORD_WEIGHTS)
+        self._keyword_pattern = compile_keyword_pattern(self.keyword_weights)
+
+    def load(self, columns=None, filters=None):
+        """读取输入；columns/filters 对 Parquet 下推到文件读取，见 record_io.read_dataframe。"""
+        self.df = self._prepare(read_dataframe(self.json_path, columns=columns, filters=filters))
+
+    def load_history(self, store, days=None, start=None, end=None, keywords=None, origins=None, columns=None):
+        """从历史库（history_store.HistoryStore）读取时间窗口内的记录，只扫描窗口内的分区。"""
+        if days is not None:
+            start = pd.Timestamp.now() - pd.Timedelta(days=days)
+        self.df = self._prepare(store.query(start=start, end=end, keywords=keywords, origins=origins, columns=columns))
 
-    def load(self):
-        with open(self.json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        self.df = pd.DataFrame(data)
+    def iter_chunks(self, chunksize=50000, days=None, columns=None, filters=None):
+        """分块读取输入（NDJSON/Parquet 为流式读取），days/filters 不为空时每块只保留满足条件的记录。"""
+        if filters is None and days is not None:
+            filters = time_filters(days=days)
+        for chunk in iter_dataframes(self.json_path, chunksize=chunksize, columns=columns, filters=filters):
+            yield self._prepare(chunk)
+
+    def load_chunked(self, chunksize=50000, days=None):
+        """分块读取并在读取时过滤时间窗口，内存中只保留窗口内的记录。"""
+        chunks = [c for c in self.iter_chunks(chunksize=chunksize, days=days) if not c.empty]
+        self.df = pd.concat(chunks, ignore_index=True) if chunks else self._prepare(pd.DataFrame())
+
+    @staticmethod
+    def _prepare(df):
         # ensure timestamp column
-        if 'scrape_time' not in self.df.columns:
-            self.df['scrape_time'] = pd.Timestamp.now()
+        if 'scrape_time' not in df.columns:
+            df['scrape_time'] = pd.Timestamp.now()
         else:
-            self.df['scrape_time'] = pd.to_datetime(self.df['scrape_time'])
+            df['scrape_time'] = pd.to_datetime(df['scrape_time'])
+        return df
 
     def filter_time_window(self, days=30):
         if self.df is None:
@@ -29,43 +106,100 @@ class SimpleAnalysisAgent:
         cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
         self.df = self.df[self.df['scrape_time'] >= cutoff]
 
-    def extract_features(self):
+    def extract_features(self, workers=1, partition_by="url"):
         # 演示：计算描述长度、关键词计数
+        # workers > 1 且描述总字符数不少于 PARALLEL_MIN_TEXT_CHARS 时按 partition_by 分区，在进程池中并行计算（见 _extract_features_parallel）
         if self.df is None:
             self.load()
-        self.df["desc_len"] = self.df["description"].fillna("").apply(len)
-        keywords = ["核桃", "产地", "新疆", "手剥"]
-        for kw in keywords:
-            self.df[f"kw_{kw}"] = self.df["description"].fillna("").str.contains(kw).astype(int)
-        # 产地标准化
+        desc = self._descriptions()
+        desc_len = desc.str.len()
+        if workers > 1 and desc_len.sum() >= PARALLEL_MIN_TEXT_CHARS:
+            self._extract_features_parallel(workers, partition_by)
+            return
+        self.df["desc_len"] = desc_len
+        for col, hits in self._keyword_hits(desc).items():
+            self.df[col] = hits
+        # 产地标准化：地名统一为省份全称（与 Dashboard 地图坐标一致），见 text_extract
         if 'origin' in self.df.columns:
-            self.df['origin'] = self.df['origin'].fillna('').str.strip()
+            # Parquet 输入的 origin 为分类列，normalize_origins 会先转回普通字符串
+            self.df['origin'] = normalize_origins(self.df['origin'])
         else:
-            self.df['origin'] = self.df['description'].fillna('').apply(lambda x: '新疆' if '新疆' in x else '')
+            # 没有产地字段时取描述中第一个地名
+            self.df['origin'] = desc.str.extract(f'({PLACE_RE.pattern})', expand=False).map(ALIAS_TO_PROVINCE).fillna('')
+
+    def _partition_labels(self, n, partition_by):
+        # 每条记录所属的分区号：keyword 按关键词分区（同一关键词的记录在同一进程），url 按 URL 哈希取模均匀分区
+        if partition_by == "keyword" and "keyword" in self.df.columns:
+            return pd.factorize(self.df["keyword"].astype(object).fillna(""))[0]
+        if "url" in self.df.columns:
+            return pd.util.hash_pandas_object(self.df["url"].astype(object).fillna("").astype(str), index=False).to_numpy() % n
+        return np.arange(len(self.df)) % n
+
+    def _extract_features_parallel(self, workers, partition_by):
+        """把记录分区后在 ProcessPoolExecutor 中计算逐条记录的特征列，再按原顺序合并回 self.df。
+
+        只把特征需要的输入列（描述与产地）发送给工作进程，返回的也只有特征列，减少进程间序列化的数据量；
+        分组与排序等全局阶段仍在合并后的完整数据上执行。
+        """
+        self.df = self.df.reset_index(drop=True)
+        inputs = [c for c in ("description", "raw_text_snippet", "origin") if c in self.df.columns]
+        labels = self._partition_labels(workers * PARTITIONS_PER_WORKER, partition_by)
+        results, pending = [], deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 同时提交的分区不超过 2 * workers，避免所有分区同时序列化占用内存
+            for label in np.unique(labels):
+                if len(pending) >= 2 * workers:
+                    results.append(pending.popleft().result())
+                pending.append(executor.submit(_feature_columns, self.df.loc[labels == label, inputs], self.keyword_weights))
+            results.extend(f.result() for f in pending)
+        features = pd.concat(results).sort_index()
+        for col in features.columns:
+            self.df[col] = features[col]
+
+    def _descriptions(self):
+        # Playwright 抓取结果没有 description 字段，使用页面正文片段代替
+        for col in ("description", "raw_text_snippet"):
+            if col in self.df.columns:
+                return self.df[col].fillna("").astype(str)
+        return pd.Series("", index=self.df.index)
 
-    def competitor_match(self):
-        # 基于标题相似度进行简单分组
+    def _keyword_hits(self, desc):
+        """一次正则扫描得到所有关键词的命中列（0/1），与逐个 str.contains 结果一致。"""
+        keywords = list(self.keyword_weights)
+        position = {kw: i for i, kw in enumerate(keywords)}
+        found = desc.reset_index(drop=True).str.findall(self._keyword_pattern).explode().dropna()
+        hits = np.zeros((len(desc), len(keywords)), dtype=bool)
+        hits[found.index.to_numpy(), found.map(position).to_numpy(dtype=int)] = True
+        # 同一位置只会匹配到最长的关键词，被更长关键词包含的短关键词需要补记命中
+        for short in keywords:
+            for long in keywords:
+                if short != long and short in long:
+                    hits[:, position[short]] |= hits[:, position[long]]
+        return {f"kw_{kw}": hits[:, position[kw]].astype(int) for kw in keywords}
+
+    def competitor_match(self, method='auto'):
+        # 基于标题相似度进行分组（token_sort_ratio > 80 并入种子标题所在组），
+        # 候选对分块/LSH 生成后用 rapidfuzz cdist 批量打分，见 competitor_grouping
         titles = self.df['title'].fillna('').tolist()
-        groups = [-1]*len(titles)
-        gid = 0
-        for i, t in enumerate(titles):
-            if groups[i] != -1:
-                continue
-            groups[i] = gid
-            for j in range(i+1, len(titles)):
-                if groups[j] == -1:
-                    score = fuzz.token_sort_ratio(t, titles[j])
-                    if score > 80:
-                        groups[j] = gid
-            gid += 1
-        self.df['comp_group'] = groups
+        self.df['comp_group'] = group_titles(titles, threshold=80, method=method)
 
-    def score(self):
-        # 简单打分：描述长度 + 包含关键词数 + 产地加分
-        self.df["score"] = self.df["desc_len"] + sum(self.df[f"kw_{kw}"]*50 for kw in ["核桃", "产地", "新疆", "手剥"])
+    def score(self, sort=True):
+        # 简单打分：描述长度 + 关键词命中加权 + 产地加分；sort=False 时只计算 score 列（之后用 top 取前 k 条）
+        kw_cols = [f"kw_{kw}" for kw in self.keyword_weights]
+        weights = np.array(list(self.keyword_weights.values()), dtype=float)
+        self.df["score"] = self.df["desc_len"] + self.df[kw_cols].to_numpy() @ weights
         # 产地为新疆加分
         self.df.loc[self.df['origin'].str.contains('新疆'), 'score'] += 200
-        self.df = self.df.sort_values("score", ascending=False)
+        if sort:
+            self.df = self.df.sort_values("score", ascending=False)
+
+    def top(self, k):
+        """只保留得分最高的 k 条（nlargest 部分选择，O(n log k)，不对全部记录排序），按得分降序。"""
+        self.df = self.df.nlargest(k, "score")
+
+    def pipeline(self, store=None, chunksize=None):
+        """返回惰性流水线（见 AnalysisPipeline）；store 不为空时从历史库读取，chunksize 不为空时分块读取。"""
+        return AnalysisPipeline(self, store=store, chunksize=chunksize)
 
     def origin_stats(self):
         return self.df['origin'].value_counts()
@@ -73,18 +207,171 @@ class SimpleAnalysisAgent:
     def to_json(self, out_path):
         self.df.to_json(out_path, force_ascii=False, orient="records", date_format="iso")
 
+    def to_parquet(self, out_path):
+        # price 转浮点、scrape_time 为时间戳、origin 为分类列
+        write_dataframe(self.df, out_path, fmt="parquet")
+
+    def save(self, out_path, fmt=None):
+        """按 fmt 或扩展名写出结果：.parquet -> Parquet，.jsonl/.ndjson -> NDJSON，其余为 JSON 数组。"""
+        write_dataframe(self.df, out_path, fmt=fmt)
+
+
+class AnalysisPipeline:
+    """SimpleAnalysisAgent 的惰性流水线：链式调用只记录阶段，collect() 时才读取输入并按顺序执行。
+
+    - where() 的时间窗口/关键词条件在读取时过滤（Parquet 下推到文件读取，历史库转为 SQL 条件）
+    - 只读取 select() 的输出列与各阶段需要的输入列；未调用 select() 时读取全部列
+    - top(k) 用 nlargest 部分选择代替全量排序；分块读取且 top 之前只有逐条记录的阶段（features、score）时，
+      逐块计算并只保留当前的前 k 条，内存占用与块大小 + k 成正比
+    - 阶段按调用顺序执行：.score().top(100).group() 只对前 100 条做竞品分组，.group().score().top(100) 对全部记录分组
+    - score() 之前没有 features() 时自动补上，top() 之前没有 score() 时自动补上
+
+    用法示例：
+    df = agent.pipeline().where(days=30).score().top(100).group().select(["url", "title", "price", "score", "comp_group"]).collect()
+    """
+
+    # 各阶段需要读取的输入列（存在时才读取）
+    STAGE_INPUTS = {"features": ["description", "raw_text_snippet", "origin"], "group": ["title"], "score": [], "top": []}
+    # 可以逐块执行的阶段（只依赖单条记录）
+    ROW_STAGES = ("features", "score")
+
+    def __init__(self, agent, store=None, chunksize=None):
+        self.agent = agent
+        self.store = store
+        self.chunksize = chunksize
+        self.stages = []
+        self.columns = None
+        self.days = self.start = self.end = None
+        self.keywords = None
+
+    def where(self, days=None, start=None, end=None, keywords=None):
+        self.days, self.start, self.end = days, start, end
+        self.keywords = list(keywords) if keywords else None
+        return self
+
+    def features(self, workers=1, partition_by="url"):
+        self.stages.append(("features", {"workers": workers, "partition_by": partition_by}))
+        return self
+
+    def group(self, method="auto"):
+        self.stages.append(("group", {"method": method}))
+        return self
+
+    def score(self):
+        self.stages.append(("score", {}))
+        return self
+
+    def top(self, k):
+        self.stages.append(("top", {"k": k}))
+        return self
+
+    def select(self, columns):
+        self.columns = list(columns)
+        return self
+
+    def plan(self):
+        """补全隐含阶段后的执行顺序，例如 [('features', ...), ('score', {}), ('top', {'k': 100})]。"""
+        requires = {"top": "score", "score": "features"}
+        stages, seen = [], set()
+        for name, kwargs in self.stages:
+            implied, need = [], requires.get(name)
+            while need is not None and need not in seen:
+                implied.insert(0, (need, {}))
+                seen.add(need)
+                need = requires.get(need)
+            stages += implied + [(name, kwargs)]
+            seen.add(name)
+        return stages
+
+    def input_columns(self, stages):
+        if self.columns is None:
+            return None
+        columns = list(self.columns) + ["scrape_time"]
+        for name, _ in stages:
+            columns += self.STAGE_INPUTS[name]
+        return list(dict.fromkeys(columns))
+
+    def _filters(self):
+        filters = time_filters(days=self.days, start=self.start, end=self.end)
+        if self.keywords:
+            filters.append(("keyword", "in", self.keywords))
+        return filters or None
+
+    def _streamable(self, stages):
+        names = [name for name, _ in stages]
+        return self.chunksize is not None and self.store is None and "top" in names and all(n in self.ROW_STAGES for n in names[:names.index("top")])
+
+    @staticmethod
+    def _run(agent, stages, sort=True):
+        names = [name for name, _ in stages]
+        for i, (name, kwargs) in enumerate(stages):
+            if name == "features":
+                agent.extract_features(**kwargs)
+            elif name == "group":
+                agent.competitor_match(**kwargs)
+            elif name == "score":
+                # 之后还要取 top 时不排序
+                agent.score(sort=sort and "top" not in names[i + 1:])
+            elif name == "top":
+                agent.top(**kwargs)
+
+    def collect(self):
+        """执行流水线，结果同时写回 agent.df（之后可以调用 agent.save 等）并返回。"""
+        agent = self.agent
+        stages = self.plan()
+        columns = self.input_columns(stages)
+        if self._streamable(stages):
+            split = [name for name, _ in stages].index("top")
+            k = stages[split][1]["k"]
+            best = None
+            for chunk in agent.iter_chunks(chunksize=self.chunksize, columns=columns, filters=self._filters()):
+                part = SimpleAnalysisAgent(None, keyword_weights=agent.keyword_weights)
+                part.df = chunk
+                self._run(part, stages[:split], sort=False)
+                part.top(k)
+                best = part.df if best is None else pd.concat([best, part.df], ignore_index=True).nlargest(k, "score")
+            agent.df = best.reset_index(drop=True) if best is not None else agent._prepare(pd.DataFrame())
+            if not agent.df.empty:
+                self._run(agent, stages[split + 1:])
+        else:
+            if self.store is not None:
+                agent.load_history(self.store, days=self.days, start=self.start, end=self.end, keywords=self.keywords, columns=columns)
+            elif self.chunksize is not None:
+                chunks = [c for c in agent.iter_chunks(chunksize=self.chunksize, columns=columns, filters=self._filters()) if not c.empty]
+                agent.df = pd.concat(chunks, ignore_index=True) if chunks else agent._prepare(pd.DataFrame())
+            else:
+                agent.load(columns=columns, filters=self._filters())
+            if not agent.df.empty:
+                self._run(agent, stages)
+        if self.columns is not None:
+            agent.df = agent.df[[c for c in self.columns if c in agent.df.columns]]
+        return agent.df
+
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) < 3:
-        print("Usage: python analysis_agent.py <input.json> <out.json>")
+    ap = argparse.ArgumentParser(description="Usage: python analysis_agent.py <input.json|input.jsonl|input.parquet> <out.json|out.jsonl|out.parquet>")
+    ap.add_argument("input")
+    ap.add_argument("out")
+    ap.add_argument("--days", type=int, default=30, help="time window in days")
+    ap.add_argument("--chunksize", type=int, default=None, help="read input in chunks of N records, filtering the time window while loading")
+    ap.add_argument("--history", action="store_true", help="treat input as a history store (SQLite) and analyze records across tasks")
+    ap.add_argument("--only-keyword", action="append", default=None, help="only records scraped for this keyword (repeatable)")
+    ap.add_argument("--keywords", type=str, default=None, help='keyword weights, e.g. "核桃:50,新疆:80,手剥" (default weight 50)')
+    ap.add_argument("--workers", type=int, default=1, help="compute per-record features in N processes (inputs with at least 50M description characters)")
+    ap.add_argument("--partition-by", choices=["url", "keyword"], default="url", help="how records are partitioned across --workers")
+    ap.add_argument("--top", type=int, default=None, help="only output the N highest-scoring records (competitor grouping runs on those N only)")
+    args = ap.parse_args()
+
+    a = SimpleAnalysisAgent(args.input, keyword_weights=parse_keyword_weights(args.keywords) if args.keywords else None)
+    pipe = a.pipeline(store=HistoryStore(args.input) if args.history else None, chunksize=args.chunksize)
+    # 时间窗口过滤在读取时执行（Parquet 下推到文件读取，历史库转为 SQL 条件）
+    pipe.where(days=args.days, keywords=args.only_keyword).features(workers=args.workers, partition_by=args.partition_by)
+    if args.top:
+        # 部分选择前 N 条，分块读取时逐块只保留前 N 条
+        pipe.score().top(args.top).group()
     else:
-        a = SimpleAnalysisAgent(sys.argv[1])
-        a.load()
-        a.filter_time_window(days=30)
-        a.extract_features()
-        a.competitor_match()
-        a.score()
-        print('Origin stats:', a.origin_stats())
-        a.to_json(sys.argv[2])
-        print("Analysis done.")
+        pipe.group().score()
+    pipe.collect()
+    print('Origin stats:', a.origin_stats())
+    a.save(args.out)
+    print("Analysis done.")
@@ -1,22 +1,49 @@
 """
 FastAPI 后端：提供接口触发抓取任务、查看任务状态与获取分析结果。
-- POST /scrape 触发抓取（参数：keyword, start_date, end_date, proxy, cookies）
+- POST /scrape 触发抓取（参数：keyword, start_date, end_date, proxy, cookies, output_format=json|ndjson|parquet）
+- POST /scrape/batch 批量关键词抓取（参数：keywords 列表，其余同上），结果写入同一个文件
 - GET /status/{task_id} 获取任务状态
-- GET /result/{task_id} 获取分析结果 JSON
+- GET /events/{celery_id}（Server-Sent Events）与 WS /ws/{celery_id}（WebSocket）推送任务进度：
+  发现/抓取/失败的链接数与各阶段耗时，任务结束（done/error）后关闭，代替轮询 /status
+- GET /result/{task_file} 获取结果文件：从磁盘流式返回，支持 offset/limit 分页与 fields 字段选择（NDJSON/Parquet/JSON），
+  按 Accept-Encoding 返回 br/gzip 压缩内容，带 ETag（If-None-Match 命中时返回 304）
 
 Celery 用于异步执行爬虫与分析任务，Redis 作为 broker 与结果后端。
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from celery.result import AsyncResult
-from tasks import scrape_and_analyze
+from tasks import scrape_and_analyze, scrape_batch_and_analyze
+from typing import List, Optional
+from record_io import FORMAT_SUFFIX, detect_format, iter_ndjson_lines
+from progress import subscribe as subscribe_progress
+import hashlib
+import json
 import uuid
 import os
+import zlib
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:
+    # 未安装 brotli 时只提供 gzip
+    brotli = None
 
 app = FastAPI()
 
+# 结果流式返回时每次从磁盘读取的字节数
+RESULT_CHUNK_BYTES = 64 * 1024
+# 小于该大小的文件不压缩
+RESULT_MIN_COMPRESS_BYTES = 1024
+RESULT_GZIP_LEVEL = int(os.getenv('RESULT_GZIP_LEVEL', '6'))
+# 流式压缩时 brotli 质量过高会明显拖慢响应
+RESULT_BROTLI_QUALITY = int(os.getenv('RESULT_BROTLI_QUALITY', '4'))
+# 进度推送没有新事件时的心跳间隔（秒），同时检查 Celery 任务是否已经结束（例如 worker 无法连接 Redis 发布事件）
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv('EVENTS_KEEPALIVE_SECONDS', '15'))
+
 # mount static frontend directory
 app.mount('/static', StaticFiles(directory='frontend'), name='static')
 
@@ -36,12 +63,20 @@ class ScrapeRequest(BaseModel):
     max_pages: int = 5
     proxy: str = None
     cookies: str = None
+    # 抓取输出格式：json / ndjson / parquet；ndjson 边抓边写，Dashboard 实时模式可分页查看进行中的结果
+    output_format: str = 'json'
+
+
+def _scrape_out_file(task_id: str, output_format: str) -> str:
+    if output_format not in FORMAT_SUFFIX:
+        raise HTTPException(status_code=400, detail=f'output_format must be one of {sorted(FORMAT_SUFFIX)}')
+    return f'data/{task_id}_scrape{FORMAT_SUFFIX[output_format]}'
 
 
 @app.post('/scrape')
 async def trigger_scrape(req: ScrapeRequest):
     task_id = str(uuid.uuid4())
-    out_file = f'data/{task_id}_scrape.json'
+    out_file = _scrape_out_file(task_id, req.output_format)
     analysis_out = f'data/{task_id}_analysis.json'
     # 确保 data 目录
     os.makedirs('data', exist_ok=True)
@@ -49,16 +84,169 @@ async def trigger_scrape(req: ScrapeRequest):
     return {'task_id': task_id, 'celery_id': celery_task.id}
 
 
+class BatchScrapeRequest(BaseModel):
+    keywords: List[str]
+    start_date: str
+    end_date: str
+    max_pages: int = 5
+    concurrency: int = 1
+    proxy: str = None
+    cookies: str = None
+    output_format: str = 'json'
+
+
+@app.post('/scrape/batch')
+async def trigger_batch_scrape(req: BatchScrapeRequest):
+    keywords = [k.strip() for k in req.keywords if k and k.strip()]
+    if not keywords:
+        raise HTTPException(status_code=400, detail='keywords must not be empty')
+    task_id = str(uuid.uuid4())
+    out_file = _scrape_out_file(task_id, req.output_format)
+    analysis_out = f'data/{task_id}_analysis.json'
+    os.makedirs('data', exist_ok=True)
+    celery_task = scrape_batch_and_analyze.delay(keywords, req.start_date, req.end_date, out_file, analysis_out, req.max_pages, req.proxy, req.cookies, req.concurrency)
+    return {'task_id': task_id, 'celery_id': celery_task.id, 'keywords': keywords}
+
+
 @app.get('/status/{celery_id}')
 async def get_status(celery_id: str):
     res = AsyncResult(celery_id)
     return {'id': celery_id, 'status': res.status, 'info': str(res.info)}
 
 
+def _celery_final_event(celery_id: str):
+    # 没有收到 done/error 事件但 Celery 任务已经结束时，用任务结果补一个结束事件
+    res = AsyncResult(celery_id)
+    if not res.ready():
+        return None
+    if res.successful():
+        return {'task_id': celery_id, 'event': 'done', 'result': res.result}
+    return {'task_id': celery_id, 'event': 'error', 'error': str(res.info)}
+
+
+async def _progress_events(celery_id: str):
+    """任务进度事件；空闲时产出 None 作为心跳，任务结束后结束。"""
+    async for event in subscribe_progress(celery_id, idle_timeout=EVENTS_KEEPALIVE_SECONDS):
+        if event is None:
+            # 查询结果后端是同步 I/O，放到线程池中执行
+            event = await run_in_threadpool(_celery_final_event, celery_id)
+            if event is None:
+                yield None
+                continue
+        yield event
+        if event.get('event') in ('done', 'error'):
+            return
+
+
+@app.get('/events/{celery_id}')
+async def stream_events(celery_id: str):
+    async def sse():
+        async for event in _progress_events(celery_id):
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+    # X-Accel-Buffering 关闭反向代理（nginx）的缓冲，事件即时到达浏览器
+    return StreamingResponse(sse(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.websocket('/ws/{celery_id}')
+async def websocket_events(websocket: WebSocket, celery_id: str):
+    await websocket.accept()
+    try:
+        async for event in _progress_events(celery_id):
+            # 心跳同时用于及时发现已断开的连接
+            await websocket.send_text(json.dumps(event if event is not None else {'event': 'keepalive'}, ensure_ascii=False, default=str))
+    except WebSocketDisconnect:
+        return
+    await websocket.close()
+
+
+def _accept_encoding(header: str) -> str:
+    """按 Accept-Encoding 选择压缩方式：br（已安装 brotli）优先，其次 gzip，q=0 表示不接受。"""
+    accepted = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    for encoding in (('br',) if brotli is not None else ()) + ('gzip',):
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def _compress(chunks, encoding: str):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=RESULT_BROTLI_QUALITY)
+        for chunk in chunks:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(RESULT_GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        yield compressor.flush()
+    else:
+        yield from chunks
+
+
+def _read_file(path: str):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(RESULT_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _etag(stat, *params) -> str:
+    # 文件修改时间与大小变化（例如 NDJSON 仍在追加）或请求参数不同时 ETag 不同；不同压缩方式内容等价，用弱 ETag
+    key = f'{stat.st_mtime_ns}-{stat.st_size}-' + '-'.join(str(p) for p in params)
+    return 'W/"' + hashlib.md5(key.encode('utf-8')).hexdigest()[:20] + '"'
+
+
 @app.get('/result/{task_file}')
-async def get_result(task_file: str):
+async def get_result(task_file: str, request: Request, offset: int = 0, limit: Optional[int] = None, fields: Optional[str] = None):
+    """返回 data 目录下的结果文件。
+
+    不带参数时 JSON/NDJSON 文件原样流式返回；带 offset/limit/fields 或文件为 Parquet 时按 NDJSON 返回对应记录区间，
+    fields 为逗号分隔的字段名。同步的文件读取与解码在线程池中执行（StreamingResponse 迭代同步生成器），不阻塞事件循环。
+    """
     path = os.path.join('data', task_file)
-    if not os.path.exists(path):
+    if task_file != os.path.basename(task_file) or task_file.startswith('.') or not os.path.isfile(path):
         raise HTTPException(status_code=404, detail='result not found')
-    with open(path, 'r', encoding='utf-8') as f:
-        return f.read()
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail='offset and limit must be non-negative')
+    columns = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    fmt = detect_format(path)
+    stat = os.stat(path)
+    etag = _etag(stat, offset, limit, ','.join(columns or []))
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if etag in [t.strip() for t in request.headers.get('if-none-match', '').split(',')]:
+        return Response(status_code=304, headers=headers)
+
+    raw = fmt != 'parquet' and offset == 0 and limit is None and columns is None
+    if raw:
+        chunks = _read_file(path)
+        media_type = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    else:
+        chunks = iter_ndjson_lines(path, offset=offset, limit=limit, fmt=fmt, columns=columns)
+        media_type = 'application/x-ndjson'
+    encoding = _accept_encoding(request.headers.get('accept-encoding', ''))
+    if raw and stat.st_size < RESULT_MIN_COMPRESS_BYTES:
+        encoding = 'identity'
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return StreamingResponse(_compress(chunks, encoding), media_type=media_type, headers=headers)
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, HTTPException
 from pydantic import BaseModel
+from typing import List
 from celery.result import AsyncResult
 import os
 from backend.celery_app import celery
@@ -19,6 +20,23 @@ def scrape(req: ScrapeRequest):
     task = celery.send_task('backend.tasks.run_scrape', args=[req.keyword, req.start_date, req.end_date, req.proxy, req.cookies])
     return {'celery_id': task.id}
 
+class BatchScrapeRequest(BaseModel):
+    keywords: List[str]
+    start_date: str
+    end_date: str
+    concurrency: int = 1
+    proxy: str = None
+    cookies: str = None
+
+@app.post('/scrape/batch')
+def scrape_batch(req: BatchScrapeRequest):
+    keywords = [k.strip() for k in req.keywords if k and k.strip()]
+    if not keywords:
+        raise HTTPException(status_code=400, detail='keywords must not be empty')
+    # 批量关键词作为一个任务提交，共享浏览器并跨关键词去重
+    task = celery.send_task('backend.tasks.run_scrape_batch', args=[keywords, req.start_date, req.end_date, req.proxy, req.cookies, req.concurrency])
+    return {'celery_id': task.id, 'keywords': keywords}
+
 @app.get('/status/{task_id}')
 def status(task_id: str):
     r = AsyncResult(task_id, app=celery)
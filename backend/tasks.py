@@ -1,10 +1,41 @@
 from backend.celery_app import celery
-from playwright_scraper import run as run_scrape
+from celery.signals import worker_process_shutdown
+from playwright_scraper import run as run_scrape, run_batch as run_scrape_batch
+from browser_pool import get_browser_pool, shutdown_browser_pool
+from fetch_cache import get_fetch_cache, DEFAULT_TTL_SECONDS
+from proxy_pool import get_proxy_pool
+from history_store import get_history_store
 import os
+import time
 
-@celery.task(name='backend.tasks.run_scrape')
-def run_scrape_task(keyword, start_date, end_date, proxy=None, cookies=None):
+
+@worker_process_shutdown.connect
+def _close_browser_pool(**kwargs):
+    # worker 子进程退出时关闭常驻浏览器
+    shutdown_browser_pool()
+
+
+def _is_fresh(path, ttl_seconds=DEFAULT_TTL_SECONDS):
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl_seconds
+
+
+@celery.task(name='backend.tasks.run_scrape', bind=True, acks_late=True, reject_on_worker_lost=True)
+def run_scrape_task(self, keyword, start_date, end_date, proxy=None, cookies=None):
     out = f'scrape_output_{keyword}_{start_date}_{end_date}.json'
+    # 同名输出在缓存 TTL 内已生成过则直接复用
+    if _is_fresh(out):
+        return {'out': out, 'cached': True}
     # 直接调用之前的 run 函数
-    run_scrape(keyword, start_date, end_date, out, proxy=proxy, cookies=cookies, headless=True)
-    return {'out': out}
+    run_scrape(keyword, start_date, end_date, out, proxy=proxy, cookies=cookies, headless=True, pool=get_browser_pool(), cache=get_fetch_cache(), resume=True, proxy_pool=get_proxy_pool())
+    # 追加到历史库，供跨任务的趋势分析
+    ingested = get_history_store().ingest_file(out, task_id=self.request.id)
+    return {'out': out, 'ingested': ingested}
+
+
+@celery.task(name='backend.tasks.run_scrape_batch', bind=True, acks_late=True, reject_on_worker_lost=True)
+def run_scrape_batch_task(self, keywords, start_date, end_date, proxy=None, cookies=None, concurrency=1):
+    # 文件名使用任务 id：不同关键词的批次不会共用输出与 .ckpt 检查点；acks_late 重新投递时 id 不变，可以从检查点继续
+    out = f'scrape_output_batch_{self.request.id}.json'
+    counts = run_scrape_batch(keywords, start_date, end_date, out, proxy=proxy, cookies=cookies, headless=True, concurrency=concurrency, pool=get_browser_pool(), cache=get_fetch_cache(), resume=True, proxy_pool=get_proxy_pool())
+    ingested = get_history_store().ingest_file(out, task_id=self.request.id)
+    return {'out': out, 'counts': counts, 'ingested': ingested}
@@ -0,0 +1,110 @@
+"""
+价格/产地抽取基准：对比原 extract_origin_from_text / extract_price_from_text（多次 re.search）与 text_extract。
+
+运行: python bench_extract.py [--pages 2000 20000] [--body-chars 5000]
+- 正文为合成数据：随机商品描述、营销词与地名，按一定比例插入 产地/发货地 标签与 ¥/元 价格
+- price_agreement：两种实现价格一致的比例（text_extract 另外支持纯数字文本，合成数据中不出现）
+- origin_on_map：产地能在 Dashboard 的 PROVINCE_COORDS 中找到坐标的比例
+- 另外对比地名扫描：前缀树编译的正则 vs 按长度排序的普通多选正则
+"""
+import argparse
+import random
+import re
+import time
+
+from text_extract import ALIAS_TO_PROVINCE, PLACE_RE, PROVINCES, extract_price_origin
+
+
+FILLER = ['新货', '薄皮', '手剥', '孕妇零食', '原味', '奶香', '包邮', '年货', '坚果', '大果', '当季', '开口', '颗粒饱满', '现货速发', '坏果包赔', '口感香脆', '产品参数', '规格', '净含量', '保质期', '储存方式', '阴凉干燥处']
+PRODUCTS = ['核桃', '纸皮核桃', '山核桃', '碧根果', '巴旦木', '夏威夷果', '开心果', '红枣', '枸杞', '葡萄干']
+FOREIGN = ['美国', '澳大利亚', '进口', '智利']
+
+
+def legacy_origin(text):
+    patterns = [r'产地[:：]\s*([^\n，。;；]+)', r'发货地[:：]\s*([^\n，。;；]+)', r'原产地[:：]\s*([^\n，。;；]+)']
+    for p in patterns:
+        m = re.search(p, text)
+        if m:
+            return m.group(1).strip()
+    if '新疆' in text:
+        return '新疆'
+    return ''
+
+
+def legacy_price(text):
+    m = re.search(r'[¥￥]\s*([0-9]+(?:\.[0-9]{1,2})?)', text)
+    if m:
+        return float(m.group(1))
+    m2 = re.search(r'([0-9]+(?:\.[0-9]{1,2})?)\s*元', text)
+    if m2:
+        return float(m2.group(1))
+    return None
+
+
+def synthetic_bodies(n, body_chars, seed=0):
+    rnd = random.Random(seed)
+    places = list(ALIAS_TO_PROVINCE)
+    bodies = []
+    for _ in range(n):
+        parts = []
+        size = 0
+        while size < body_chars:
+            r = rnd.random()
+            if r < 0.05:
+                word = rnd.choice(places)
+            elif r < 0.15:
+                word = rnd.choice(PRODUCTS)
+            else:
+                word = rnd.choice(FILLER)
+            parts.append(word)
+            size += len(word) + 1
+        # 标签与价格插入到随机位置（也可能不出现）
+        if rnd.random() < 0.7:
+            label = rnd.choice(['产地：', '原产地：', '发货地：'])
+            value = rnd.choice(FOREIGN) if rnd.random() < 0.1 else rnd.choice(places) + rnd.choice(['', '市', '县'])
+            parts.insert(rnd.randrange(len(parts)), label + value)
+        if rnd.random() < 0.8:
+            price = f'{rnd.uniform(5, 300):.2f}'
+            parts.insert(rnd.randrange(len(parts)), rnd.choice(['¥', '￥', '到手价¥']) + price if rnd.random() < 0.7 else price + '元')
+        bodies.append('\n'.join(parts))
+    return bodies
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def run_legacy(bodies):
+    return [(legacy_price(b), legacy_origin(b)) for b in bodies]
+
+
+def run_new(bodies):
+    return [extract_price_origin(b) for b in bodies]
+
+
+def scan_places(pattern, bodies):
+    return sum(len(pattern.findall(b)) for b in bodies)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--pages', type=int, nargs='+', default=[2000, 20000])
+    ap.add_argument('--body-chars', type=int, default=5000)
+    args = ap.parse_args()
+
+    provinces = set(PROVINCES)
+    alternation = re.compile('|'.join(re.escape(a) for a in sorted(ALIAS_TO_PROVINCE, key=len, reverse=True)))
+    for n in args.pages:
+        bodies = synthetic_bodies(n, args.body_chars)
+        mb = sum(len(b.encode('utf-8')) for b in bodies) / 1e6
+        print(f'pages={n}  corpus={mb:.1f}MB')
+        legacy, t_legacy = timed(run_legacy, bodies)
+        new, t_new = timed(run_new, bodies)
+        price_agreement = sum(a[0] == b[0] for a, b in zip(legacy, new)) / n
+        print(f'  legacy      : {t_legacy:8.2f}s  {mb / t_legacy:7.1f}MB/s  origin_on_map={sum(o in provinces for _, o in legacy) / n:.3f}')
+        print(f'  text_extract: {t_new:8.2f}s  {mb / t_new:7.1f}MB/s  origin_on_map={sum(o in provinces for _, o in new) / n:.3f}  price_agreement={price_agreement:.4f}')
+        hits, t_trie = timed(scan_places, PLACE_RE, bodies)
+        hits_alt, t_alt = timed(scan_places, alternation, bodies)
+        print(f'  place scan  : trie regex {t_trie:.2f}s vs alternation {t_alt:.2f}s  matches={hits}/{hits_alt}')
@@ -0,0 +1,95 @@
+"""
+竞品分组基准：对比原 competitor_match 的 O(n²) 循环与 competitor_grouping 引擎。
+
+运行: python bench_grouping.py [--sizes 1000 10000 100000] [--legacy-max 10000]
+- 标题为合成数据：若干商品"模板"加随机规格/营销词/错字变体
+- 原循环在 n > legacy-max 时跳过（100k 时需要约 50 亿次比较）
+- exact 结果应与原循环完全一致；lsh 输出与 exact 的分组一致率
+"""
+import argparse
+import random
+import time
+
+from rapidfuzz import fuzz
+
+from competitor_grouping import group_titles
+
+
+PRODUCTS = ['新疆薄皮核桃', '云南纸皮核桃', '手剥山核桃', '碧根果', '巴旦木', '夏威夷果', '开心果', '腰果', '榛子', '松子']
+SPECS = ['500g', '1kg', '2斤装', '5斤装', '250g*2袋', '整箱', '礼盒装', '散装']
+WORDS = ['新货', '特级', '孕妇零食', '原味', '奶香', '包邮', '年货', '坚果', '大果', '当季']
+
+
+def legacy_groups(titles, threshold=80):
+    groups = [-1]*len(titles)
+    gid = 0
+    for i, t in enumerate(titles):
+        if groups[i] != -1:
+            continue
+        groups[i] = gid
+        for j in range(i+1, len(titles)):
+            if groups[j] == -1:
+                score = fuzz.token_sort_ratio(t, titles[j])
+                if score > threshold:
+                    groups[j] = gid
+        gid += 1
+    return groups
+
+
+def synthetic_titles(n, seed=0):
+    rnd = random.Random(seed)
+    templates = []
+    for _ in range(max(10, n // 20)):
+        parts = [rnd.choice(PRODUCTS), rnd.choice(SPECS)] + rnd.sample(WORDS, 3)
+        rnd.shuffle(parts)
+        templates.append(parts)
+    titles = []
+    for _ in range(n):
+        parts = list(rnd.choice(templates))
+        r = rnd.random()
+        if r < 0.3:
+            parts[rnd.randrange(len(parts))] = rnd.choice(WORDS)
+        elif r < 0.5:
+            parts.append(rnd.choice(SPECS))
+        title = ' '.join(parts)
+        if rnd.random() < 0.2:
+            k = rnd.randrange(len(title))
+            title = title[:k] + title[k+1:]
+        titles.append(title)
+    return titles
+
+
+def agreement(a, b):
+    """两个分组结果中"同组/不同组"判断一致的比例（在随机抽样的下标对上估计）。"""
+    rnd = random.Random(1)
+    n = len(a)
+    pairs = [(rnd.randrange(n), rnd.randrange(n)) for _ in range(200000)]
+    same = sum((a[i] == a[j]) == (b[i] == b[j]) for i, j in pairs)
+    return same / len(pairs)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    ap.add_argument('--legacy-max', type=int, default=10000)
+    args = ap.parse_args()
+
+    for n in args.sizes:
+        titles = synthetic_titles(n)
+        print(f'n={n}')
+        legacy = None
+        if n <= args.legacy_max:
+            legacy, t = timed(legacy_groups, titles)
+            print(f'  legacy loop : {t:8.2f}s  groups={max(legacy) + 1}')
+        else:
+            print('  legacy loop : skipped')
+        exact, t = timed(group_titles, titles, method='exact')
+        print(f'  exact       : {t:8.2f}s  groups={max(exact) + 1}' + (f'  identical_to_legacy={exact == legacy}' if legacy else ''))
+        lsh, t = timed(group_titles, titles, method='lsh')
+        print(f'  lsh         : {t:8.2f}s  groups={max(lsh) + 1}  pair_agreement_vs_exact={agreement(lsh, exact):.4f}')
@@ -0,0 +1,158 @@
+"""
+进程级浏览器池：每个进程（例如 Celery worker 子进程）只启动一次 Playwright 与 Chromium，
+每个任务从池中领取一个隔离的 BrowserContext（可带独立代理），用完即关闭。
+
+- 同一浏览器被领取 max_uses 次后会被回收重启，避免长时间运行导致的内存膨胀
+- 浏览器崩溃（disconnected）时自动重新启动
+- 回收时若仍有任务在使用旧浏览器，会等最后一个 context 关闭后再关闭旧浏览器
+
+Playwright 对象绑定在创建它的事件循环上，因此同一进程内的所有调用都应使用
+get_worker_loop() 返回的同一个事件循环。
+
+用法示例：
+from browser_pool import get_browser_pool, get_worker_loop
+pool = get_browser_pool()
+
+async def job():
+    async with pool.context(proxy='http://host:port') as context:
+        page = await context.new_page()
+        ...
+
+get_worker_loop().run_until_complete(job())
+"""
+import asyncio
+import atexit
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+
+DEFAULT_MAX_USES = int(os.getenv('BROWSER_POOL_MAX_USES', '50'))
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_pools: Dict[bool, 'BrowserPool'] = {}
+
+
+class BrowserPool:
+    def __init__(self, headless: bool = True, max_uses: int = DEFAULT_MAX_USES, user_agent: Optional[str] = None):
+        self.headless = headless
+        self.max_uses = max_uses
+        self.user_agent = user_agent
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._uses = 0
+        # 每个浏览器上仍未关闭的 context 数量
+        self._active: Dict[Browser, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def _acquire_browser(self) -> Browser:
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            if self._browser is not None and (not self._browser.is_connected() or self._uses >= self.max_uses):
+                old = self._browser
+                self._browser = None
+                if not self._active.get(old):
+                    await self._close_browser(old)
+            if self._browser is None:
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                self._uses = 0
+            self._uses += 1
+            self._active[self._browser] = self._active.get(self._browser, 0) + 1
+            return self._browser
+
+    async def _release_browser(self, browser: Browser):
+        async with self._lock:
+            self._active[browser] = self._active.get(browser, 1) - 1
+            if self._active[browser] <= 0:
+                del self._active[browser]
+                # 已被回收（不再是当前浏览器）的旧浏览器在最后一个 context 关闭后关闭
+                if browser is not self._browser:
+                    await self._close_browser(browser)
+
+    async def _close_browser(self, browser: Browser):
+        try:
+            await browser.close()
+        except Exception as e:
+            print('Failed to close browser:', e)
+
+    @asynccontextmanager
+    async def context(self, proxy: Optional[str] = None, **context_options):
+        """领取一个隔离的 BrowserContext；退出 with 块时自动关闭并归还浏览器。"""
+        if self.user_agent and 'user_agent' not in context_options:
+            context_options['user_agent'] = self.user_agent
+        if proxy:
+            # Playwright 支持按 context 设置代理
+            context_options['proxy'] = {'server': proxy}
+
+        browser = await self._acquire_browser()
+        try:
+            context: BrowserContext = await browser.new_context(**context_options)
+        except Exception:
+            # 浏览器可能已崩溃：标记为用尽以便下次领取时重启，然后重试一次
+            await self._release_browser(browser)
+            self._uses = self.max_uses
+            browser = await self._acquire_browser()
+            try:
+                context = await browser.new_context(**context_options)
+            except Exception:
+                await self._release_browser(browser)
+                raise
+
+        try:
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+            await self._release_browser(browser)
+
+    async def close(self):
+        async with self._lock:
+            browsers = set(self._active)
+            if self._browser is not None:
+                browsers.add(self._browser)
+            for browser in browsers:
+                await self._close_browser(browser)
+            self._browser = None
+            self._active.clear()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """返回进程内共享的事件循环（浏览器池中的 Playwright 对象都绑定在它上面）。"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """返回当前进程的浏览器池单例（按 headless 区分）。"""
+    pool = _pools.get(headless)
+    if pool is None:
+        from playwright_scraper import DEFAULT_HEADERS
+        pool = BrowserPool(headless=headless, user_agent=DEFAULT_HEADERS['User-Agent'])
+        _pools[headless] = pool
+    return pool
+
+
+def shutdown_browser_pool():
+    """关闭当前进程内所有浏览器池（在 worker 进程退出时调用）。"""
+    if not _pools:
+        return
+    loop = get_worker_loop()
+    for pool in list(_pools.values()):
+        try:
+            loop.run_until_complete(pool.close())
+        except Exception as e:
+            print('Failed to shut down browser pool:', e)
+    _pools.clear()
+
+
+atexit.register(shutdown_browser_pool)
@@ -0,0 +1,104 @@
+"""
+抓取断点续传：把每个关键词的待抓取链接（frontier）与已完成的详情记录增量追加到检查点文件，
+进程崩溃或 Celery worker 重启后可以用 resume 模式跳过已完成的 URL 与已完成的搜索。
+
+检查点文件为 JSON Lines，每行一条事件：
+{"type": "frontier", "keyword": "核桃", "links": [...]}
+{"type": "record", "record": {...}}
+{"type": "failed", "url": "...", "error": "..."}   # 重试后仍失败的链接；resume 时会重新抓取
+{"type": "search_failed", "keyword": "核桃", "error": "..."}   # 搜索页重试后仍失败；不保存 frontier，resume 时重新搜索
+
+用法示例：
+ckpt = ScrapeCheckpoint('out.json.ckpt', resume=True)
+links = ckpt.frontier('核桃')
+...
+ckpt.add_record(record)
+ckpt.close(remove=True)   # 全部完成后删除检查点
+"""
+import json
+import os
+from typing import Dict, List, Optional
+
+from fetch_cache import normalize_url
+
+
+def checkpoint_path_for(out_path: str) -> str:
+    return out_path + '.ckpt'
+
+
+class ScrapeCheckpoint:
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self._frontiers: Dict[str, List[str]] = {}
+        self._records: Dict[str, dict] = {}
+        self._failed: Dict[str, str] = {}
+        self._failed_searches: Dict[str, str] = {}
+        if resume and os.path.exists(path):
+            self._load()
+            print(f'Resuming from {path}: {len(self._records)} records, {len(self._frontiers)} keywords searched')
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._f = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._f.tell() > 0:
+            # 上次可能在行中间崩溃，先换行，避免新事件与残缺行拼在一起
+            self._f.write('\n')
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                if event.get('type') == 'frontier':
+                    self._frontiers[event['keyword']] = event['links']
+                elif event.get('type') == 'record':
+                    record = event['record']
+                    self._records[normalize_url(record['url'])] = record
+                elif event.get('type') == 'failed':
+                    self._failed[normalize_url(event['url'])] = event.get('error', '')
+                elif event.get('type') == 'search_failed':
+                    self._failed_searches[event['keyword']] = event.get('error', '')
+
+    def _append(self, event: dict):
+        self._f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self._f.flush()
+
+    def frontier(self, keyword: str) -> Optional[List[str]]:
+        """返回该关键词上次保存的候选链接；未搜索过返回 None。"""
+        return self._frontiers.get(keyword)
+
+    def set_frontier(self, keyword: str, links: List[str]):
+        self._frontiers[keyword] = list(links)
+        self._append({'type': 'frontier', 'keyword': keyword, 'links': list(links)})
+
+    def add_failed_search(self, keyword: str, error: str = ''):
+        # 只记录失败，不写 frontier：空的 frontier 会让 resume 把该关键词当作已搜索完成
+        self._failed_searches[keyword] = error
+        self._append({'type': 'search_failed', 'keyword': keyword, 'error': error})
+
+    def failed_searches(self) -> List[str]:
+        """搜索页重试后仍失败、且之后没有搜索成功的关键词。"""
+        return [k for k in self._failed_searches if k not in self._frontiers]
+
+    def get(self, url: str) -> Optional[dict]:
+        return self._records.get(normalize_url(url))
+
+    def add_record(self, record: dict):
+        self._records[normalize_url(record['url'])] = record
+        self._append({'type': 'record', 'record': record})
+
+    def add_failed(self, url: str, error: str = ''):
+        self._failed[normalize_url(url)] = error
+        self._append({'type': 'failed', 'url': url, 'error': error})
+
+    def failed(self) -> List[str]:
+        """重试后仍失败、且之后没有成功抓取的链接。"""
+        return [u for u in self._failed if u not in self._records]
+
+    def close(self, remove: bool = False):
+        if not self._f.closed:
+            self._f.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,137 @@
+"""
+竞品标题分组引擎：替代 competitor_match 中 O(n²) 的纯 Python 两两比较。
+
+分组语义与原实现一致：按顺序遍历标题，未分组的标题作为种子开启新组，并把其后所有
+token_sort_ratio > threshold 且尚未分组的标题并入该组（只与种子比较，不做传递闭包）。
+
+加速手段：
+1. 完全相同的标题合并为一个唯一标题（相同标题得分为 100，必然同组）
+2. 每个种子只与"仍未分组"的候选标题打分，候选用 rapidfuzz.process.cdist 一次批量计算
+   （候选较多时 workers=-1 多线程），已分组的标题不再参与后续比较
+3. 候选集合：
+   - exact：所有未分组的唯一标题（结果与原循环完全一致）
+   - lsh：与种子落入同一 MinHash-LSH 桶（词内字符 bigram）的未分组标题，
+     只比较相似的一小部分标题，可能漏掉极少数低相似度的对
+
+method='auto' 时唯一标题数不超过 EXACT_MAX 用 exact，否则用 lsh。
+基准见 bench_grouping.py。
+"""
+import zlib
+from typing import Dict, List, Sequence, Set
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+EXACT_MAX = 5000
+# 候选数超过该值时 cdist 使用多线程，较少时线程启动开销反而更大
+PARALLEL_MIN = 2000
+
+LSH_BANDS = 20
+LSH_ROWS = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _shingles(title: str) -> Set[int]:
+    # 只取每个词内部的字符 bigram，与 token_sort_ratio 一样不受词序影响
+    grams = set()
+    for tok in title.split():
+        if len(tok) < 2:
+            grams.add(tok)
+        else:
+            grams.update(tok[i:i + 2] for i in range(len(tok) - 1))
+    return {zlib.crc32(g.encode('utf-8')) for g in grams} or {0}
+
+
+def _minhash_signatures(titles: Sequence[str], num_perm: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    sigs = np.empty((len(titles), num_perm), dtype=np.uint64)
+    for i, t in enumerate(titles):
+        hv = np.fromiter(_shingles(t), dtype=np.uint64)
+        # (a * x + b) mod p，x 与 a 均小于 2^32，乘积不会溢出 uint64
+        sigs[i] = ((np.outer(a, hv) + b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+    return sigs
+
+
+class _LshIndex:
+    """MinHash-LSH 索引：candidates(u) 返回与 u 至少在一个 band 上同桶、且仍存活的标题。"""
+
+    def __init__(self, titles: Sequence[str], bands: int, rows: int):
+        sigs = _minhash_signatures(titles, bands * rows)
+        buckets: List[List[int]] = []
+        self._bucket_of = np.empty((len(titles), bands), dtype=np.int64)
+        for band in range(bands):
+            table: Dict[bytes, int] = {}
+            band_sigs = sigs[:, band * rows:(band + 1) * rows]
+            for i in range(len(titles)):
+                key = band_sigs[i].tobytes()
+                bid = table.get(key)
+                if bid is None:
+                    bid = table[key] = len(buckets)
+                    buckets.append([])
+                buckets[bid].append(i)
+                self._bucket_of[i, band] = bid
+        self._buckets = [np.asarray(m, dtype=np.int64) for m in buckets]
+
+    def candidates(self, u: int, alive: np.ndarray) -> np.ndarray:
+        found = []
+        for bid in self._bucket_of[u].tolist():
+            # 顺带把已分组的标题从桶里删掉，每个标题在每个桶里只会被扫描删除一次
+            members = self._buckets[bid]
+            members = members[alive[members]]
+            self._buckets[bid] = members
+            found.append(members)
+        out = np.unique(np.concatenate(found))
+        return out[out != u]
+
+
+def group_titles(titles: Sequence[str], threshold: float = 80, method: str = 'auto', bands: int = LSH_BANDS, rows: int = LSH_ROWS) -> List[int]:
+    """返回与 titles 等长的组号列表（语义同原 competitor_match 的贪心分组）。"""
+    # 合并完全相同的标题
+    unique_index: Dict[str, int] = {}
+    unique_of = []
+    for t in titles:
+        unique_of.append(unique_index.setdefault(t, len(unique_index)))
+    uniques = list(unique_index)
+    members: List[List[int]] = [[] for _ in uniques]
+    for i, u in enumerate(unique_of):
+        members[u].append(i)
+
+    if method == 'auto':
+        method = 'exact' if len(uniques) <= EXACT_MAX else 'lsh'
+    if method == 'lsh':
+        index = _LshIndex(uniques, bands, rows)
+    elif method != 'exact':
+        raise ValueError(f'unknown grouping method: {method}')
+
+    # 处理到第 i 个标题时，i 之前的标题都已分组；因此种子把某个唯一标题的成员全部并入后，
+    # 该唯一标题即可从候选中移除（alive=False），后续种子不再与它比较
+    alive = np.ones(len(uniques), dtype=bool)
+    alive_ids = np.arange(len(uniques))
+    groups = [-1] * len(titles)
+    gid = 0
+    for i, u in enumerate(unique_of):
+        if groups[i] != -1:
+            continue
+        alive[u] = False
+        if method == 'exact':
+            alive_ids = alive_ids[alive[alive_ids]]
+            cands = alive_ids
+        else:
+            cands = index.candidates(u, alive)
+        matched = [u]
+        if len(cands):
+            scores = process.cdist([uniques[u]], [uniques[v] for v in cands.tolist()], scorer=fuzz.token_sort_ratio,
+                                   score_cutoff=threshold, dtype=np.float64,
+                                   workers=-1 if len(cands) >= PARALLEL_MIN else 1)[0]
+            matched.extend(cands[scores > threshold].tolist())
+        for v in matched:
+            alive[v] = False
+            for j in members[v]:
+                if groups[j] == -1:
+                    groups[j] = gid
+        gid += 1
+    return groups
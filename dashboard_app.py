@@ -1,16 +1,51 @@
 """
 使用 Streamlit 展示分析结果的最小 Dashboard
 运行: streamlit run dashboard_app.py
+
+每次交互（点击侧栏）Streamlit 都会重跑整个脚本，为保证 10 万行以上的结果也能亚秒级响应：
+- 解析后的数据按文件内容哈希缓存（st.cache_data，限制条目数自动淘汰），只在换文件时重新解析
+- 加载时一次性预计算 按天 × 产地 × 描述长度分箱 的汇总表，筛选后的产地统计、关键词命中与
+  描述长度分布都从汇总表聚合，不再扫描明细行；结果按 (文件哈希, 筛选条件) 缓存
+- 明细表只展示得分最高的 MAX_TABLE_ROWS 行，直方图使用预先分箱的计数
+
+"任务（实时）"模式直接读取 data 目录下各任务的输出（与 FastAPI /result 相同的文件），不需要上传：
+- 每 LIVE_POLL_SECONDS 秒轮询一次任务列表；进行中的任务增量读取检查点中新追加的记录，只读新内容
+- 结果文件按页懒加载（Parquet 只解码所需 row group），文件未变化时直接使用缓存；NDJSON 结果的条数从上次统计位置增量累计
 """
+import hashlib
+import io
+import os
+from collections import Counter, deque
+from datetime import datetime
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from analysis_agent import SimpleAnalysisAgent
+from checkpoint import checkpoint_path_for
+from history_store import DEFAULT_HISTORY_PATH, get_history_store
+from record_io import NdjsonCounter, NdjsonTailer, count_records, detect_format, read_page
+from task_results import DATA_DIR, list_tasks
+from text_extract import normalize_origins
 
-st.title("选品分析 - 核桃 (MVP)")
+# 页面用到的列，Parquet 只读取这些列
+DASHBOARD_COLUMNS = ["title", "url", "origin", "score", "desc_len", "scrape_time"]
+TABLE_COLUMNS = ["title", "url", "origin", "score"]
+
+# 明细表最多展示的行数（按得分取前 N 行）
+MAX_TABLE_ROWS = 500
+HIST_BINS = 20
+# 每个缓存函数最多保留的条目数，超出后按最近最少使用淘汰
+CACHE_ENTRIES = 32
 
-uploaded = st.file_uploader("上传分析结果 JSON", type=["json"])
+# 实时模式：轮询间隔、列出的任务数、每页行数选项、展示的最新记录数
+LIVE_POLL_SECONDS = 5
+LIVE_TASK_LIMIT = 50
+LIVE_PAGE_SIZES = [50, 100, 500]
+LIVE_RECENT_ROWS = 20
 
-# 省级经纬度映射（用于散点地图热力展示，部分省份示例）
+# 省级经纬度映射（用于散点地图热力展示），键与 text_extract.PROVINCES 一致
 PROVINCE_COORDS = {
     '北京市': (39.9042, 116.4074),
     '天津市': (39.3434, 117.3616),
@@ -45,63 +80,250 @@ PROVINCE_COORDS = {
     '新疆维吾尔自治区': (43.7928, 87.6177),
 }
 
-if uploaded is not None:
-    df = pd.read_json(uploaded)
+
+def prepare_frame(df):
+    """统一列类型并补充 day 列，只在加载时执行一次。"""
     # 确保时间列
     if 'scrape_time' in df.columns:
         df['scrape_time'] = pd.to_datetime(df['scrape_time'])
     else:
         df['scrape_time'] = pd.Timestamp.now()
+    df['day'] = df['scrape_time'].dt.normalize()
+    if 'origin' in df.columns:
+        # Parquet 中 origin 为分类列，转回普通字符串；旧数据中的简称/城市名映射为 PROVINCE_COORDS 中的省份全称
+        df['origin'] = normalize_origins(df['origin'])
+    else:
+        df['origin'] = ''
+    if 'score' in df.columns:
+        df = df.sort_values('score', ascending=False, kind='stable')
+    return df.reset_index(drop=True)
+
+
+@st.cache_data(max_entries=8, show_spinner="解析数据…")
+def load_upload(file_hash, name, _data):
+    # _data 以下划线开头不参与缓存键的哈希，缓存键为文件内容哈希 file_hash
+    if name.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        names = pq.read_schema(io.BytesIO(_data)).names
+        wanted = [c for c in names if c in DASHBOARD_COLUMNS or c.startswith("kw_")]
+        df = pd.read_parquet(io.BytesIO(_data), columns=wanted)
+    else:
+        df = pd.read_json(io.BytesIO(_data))
+    return prepare_frame(df)
+
+
+@st.cache_data(max_entries=8, ttl=300, show_spinner="查询历史库…")
+def load_history(path, version, start, end, keywords):
+    # 历史库：按时间窗口与关键词查询所有任务的记录，现场计算特征与得分；version 变化（有新导入）时重新查询
+    store = get_history_store(path)
+    agent = SimpleAnalysisAgent(path)
+    agent.load_history(store, start=start, end=end, keywords=list(keywords) or None)
+    if agent.df.empty:
+        return None, None
+    agent.extract_features()
+    agent.score()
+    trend = store.daily_stats(start=start, end=end, keywords=list(keywords) or None)
+    return prepare_frame(agent.df), trend
+
+
+def file_version(path):
+    # 用文件（SQLite 库含 WAL）的修改时间与大小判断是否有新数据
+    stats = [os.stat(p) for p in (path, path + '-wal') if os.path.exists(p)]
+    return tuple((s.st_mtime_ns, s.st_size) for s in stats)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def build_rollup(data_key, _df):
+    """按 天 × 产地 × 描述长度分箱 汇总条数与关键词命中数，之后的筛选统计都基于该表。"""
+    kw_cols = [c for c in _df.columns if c.startswith("kw_")]
+    if 'desc_len' in _df.columns and _df['desc_len'].notna().any():
+        lengths = _df['desc_len'].fillna(0).to_numpy(dtype=float)
+        edges = np.histogram_bin_edges(lengths, bins=HIST_BINS)
+        bins = np.clip(np.searchsorted(edges, lengths, side='right') - 1, 0, HIST_BINS - 1)
+    else:
+        edges, bins = None, np.zeros(len(_df), dtype=int)
+    parts = _df[['day', 'origin'] + kw_cols].assign(len_bin=bins, count=1)
+    rollup = parts.groupby(['day', 'origin', 'len_bin'], sort=False)[['count'] + kw_cols].sum().reset_index()
+    return rollup, edges, kw_cols
+
+
+def _window_mask(frame, start, end, origins):
+    mask = (frame['day'] >= pd.Timestamp(start)) & (frame['day'] <= pd.Timestamp(end))
+    if origins is not None:
+        mask &= frame['origin'].isin(origins)
+    return mask
+
 
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def filtered_aggregates(data_key, start, end, origins, _rollup, _edges, kw_cols):
+    r = _rollup[_window_mask(_rollup, start, end, origins)]
+    origin_df = r.groupby('origin')['count'].sum().sort_values(ascending=False).reset_index()
+    origin_df['origin'] = origin_df['origin'].replace('', '未知')
+    coords = origin_df['origin'].map(PROVINCE_COORDS)
+    origin_df['lat'] = coords.map(lambda c: c[0] if isinstance(c, tuple) else None)
+    origin_df['lon'] = coords.map(lambda c: c[1] if isinstance(c, tuple) else None)
+    kw_sum = r[list(kw_cols)].sum().reset_index()
+    kw_sum.columns = ["keyword", "count"]
+    hist = None
+    if _edges is not None:
+        counts = r.groupby('len_bin')['count'].sum().reindex(range(HIST_BINS), fill_value=0).to_numpy()
+        hist = pd.DataFrame({'desc_len': (_edges[:-1] + _edges[1:]) / 2, 'count': counts})
+    return origin_df, kw_sum, hist, int(r['count'].sum())
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def top_rows(data_key, start, end, origins, n, _df):
+    # 数据已按得分降序排列，筛选后取前 n 行即为得分最高的 n 行
+    cols = [c for c in TABLE_COLUMNS if c in _df.columns]
+    return _df.loc[_window_mask(_df, start, end, origins), cols].head(n)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def result_count(path, version):
+    return count_records(path)
+
+
+def live_result_count(path, version):
+    # NDJSON 结果边写边读：从上次统计到的字节位置继续数新追加的行，刷新时不重新扫描整个文件
+    if detect_format(path) != "ndjson":
+        return result_count(path, version)
+    counters = st.session_state.setdefault("live_counters", {})
+    counter = counters.get(path)
+    if counter is None:
+        counter = counters[path] = NdjsonCounter(path)
+    return counter.update()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def result_page(path, version, offset, limit):
+    return read_page(path, offset=offset, limit=limit)
+
+
+def _task_progress(task):
+    """进行中的任务：增量读取检查点（JSONL）中新追加的事件，累计记录数与产地分布。"""
+    progress = st.session_state.setdefault("live_progress", {})
+    state = progress.get(task.task_id)
+    if state is None:
+        state = progress[task.task_id] = {
+            "tailer": NdjsonTailer(checkpoint_path_for(task.scrape_path)),
+            "links": {}, "records": 0, "origins": Counter(), "recent": deque(maxlen=LIVE_RECENT_ROWS),
+        }
+    added = 0
+    for event in state["tailer"].read_new():
+        if event.get("type") == "frontier":
+            state["links"][event["keyword"]] = len(event["links"])
+        elif event.get("type") == "record":
+            record = event["record"]
+            state["records"] += 1
+            state["origins"][record.get("origin") or "未知"] += 1
+            state["recent"].appendleft(record)
+            added += 1
+    return state, added
+
+
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def live_panel(data_dir):
+    tasks = list_tasks(data_dir, limit=LIVE_TASK_LIMIT)
+    if not tasks:
+        st.info(f"{data_dir} 下还没有任务输出。")
+        return
+    by_id = {t.task_id: t for t in tasks}
+    task_id = st.selectbox("任务", list(by_id), key="live_task",
+                           format_func=lambda tid: f"{tid[:8]} · {by_id[tid].status} · {datetime.fromtimestamp(by_id[tid].updated_at):%m-%d %H:%M:%S}")
+    task = by_id[task_id]
+
+    if task.status == "running":
+        state, added = _task_progress(task)
+        total_links = sum(state["links"].values())
+        st.metric("已抓取", state["records"], delta=added or None)
+        if total_links:
+            st.progress(min(state["records"] / total_links, 1.0), text=f"{state['records']} / {total_links} 个候选链接")
+        if state["origins"]:
+            origin_df = pd.DataFrame(state["origins"].most_common(), columns=["origin", "count"])
+            st.plotly_chart(px.bar(origin_df, x="origin", y="count"), use_container_width=True)
+        if state["recent"]:
+            st.caption("最新记录")
+            recent = pd.DataFrame(list(state["recent"]))
+            st.dataframe(recent[[c for c in ["title", "url", "origin", "price", "keyword"] if c in recent.columns]])
+
+    path = task.result_path
+    if not path or not os.path.exists(path):
+        return
+    version = file_version(path)
+    if task.status == "running" and detect_format(path) != "ndjson":
+        # JSON 数组在抓取结束前没有闭合、Parquet 在结束前没有写出 footer，都无法读取
+        return
+    total = live_result_count(path, version)
+    st.subheader(f"{'分析结果' if task.analysis_path else '抓取结果'}（{total} 条）")
+    page_size = st.selectbox("每页行数", LIVE_PAGE_SIZES, key="live_page_size")
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = st.number_input("页码", min_value=1, max_value=pages, value=1, step=1, key="live_page")
+    page_df = result_page(path, version, (page - 1) * page_size, page_size)
+    st.dataframe(page_df[[c for c in TABLE_COLUMNS + ["price", "scrape_time"] if c in page_df.columns]])
+
+
+st.title("选品分析 - 核桃 (MVP)")
+
+source = st.sidebar.radio("数据来源", ["上传文件", "历史库", "任务（实时）"])
+df = None
+data_key = None
+trend_df = None
+if source == "上传文件":
+    uploaded = st.file_uploader("上传分析结果 JSON / Parquet", type=["json", "parquet"])
+    if uploaded is not None:
+        data = uploaded.getvalue()
+        data_key = hashlib.sha1(data).hexdigest()
+        df = load_upload(data_key, uploaded.name, data)
+elif source == "历史库":
+    history_path = st.sidebar.text_input("历史库路径", DEFAULT_HISTORY_PATH)
+    store = get_history_store(history_path)
+    lo, hi = store.time_range()
+    if lo is not None:
+        hist_start = st.sidebar.date_input("历史开始日期", max(lo.date(), (hi - pd.Timedelta(days=90)).date()))
+        hist_end = st.sidebar.date_input("历史结束日期", hi.date())
+        hist_keywords = tuple(st.sidebar.multiselect("关键词", store.keywords()))
+        version = file_version(history_path)
+        df, trend_df = load_history(history_path, version, hist_start, hist_end, hist_keywords)
+        data_key = f"history:{history_path}:{version}:{hist_start}:{hist_end}:{hist_keywords}"
+
+if source == "任务（实时）":
+    live_panel(st.sidebar.text_input("结果目录", DATA_DIR))
+elif df is not None:
     st.sidebar.subheader('筛选')
-    min_date = df['scrape_time'].min().date()
-    max_date = df['scrape_time'].max().date()
+    min_date = df['day'].min().date()
+    max_date = df['day'].max().date()
     start_date = st.sidebar.date_input('开始日期', min_date)
     end_date = st.sidebar.date_input('结束日期', max_date)
 
     # 产地筛选
-    origins = ['All'] + sorted(df['origin'].fillna('').unique().tolist())
+    origins = ['All'] + sorted(df['origin'].unique().tolist())
     selected_origins = st.sidebar.multiselect('产地筛选 (可多选)', origins, default=['All'])
+    origin_filter = None if 'All' in selected_origins else tuple(selected_origins)
 
-    # 过滤时间窗口
-    mask = (df['scrape_time'].dt.date >= start_date) & (df['scrape_time'].dt.date <= end_date)
-    df_filtered = df.loc[mask].copy()
-    if 'All' not in selected_origins:
-        df_filtered = df_filtered[df_filtered['origin'].isin(selected_origins)]
+    rollup, edges, kw_cols = build_rollup(data_key, df)
+    origin_df, kw_sum, hist_df, total = filtered_aggregates(data_key, start_date, end_date, origin_filter, rollup, edges, tuple(kw_cols))
+    table = top_rows(data_key, start_date, end_date, origin_filter, MAX_TABLE_ROWS, df)
 
     st.subheader("候选商品表")
-    st.dataframe(df_filtered[["title", "url", "origin", "score"]])
+    if total > len(table):
+        st.caption(f"共 {total} 条，按得分展示前 {len(table)} 条")
+    st.dataframe(table)
 
-    st.subheader("描述长度分布")
-    fig = px.histogram(df_filtered, x="desc_len", nbins=20)
-    st.plotly_chart(fig, use_container_width=True)
+    if hist_df is not None:
+        st.subheader("描述长度分布")
+        fig = px.bar(hist_df, x="desc_len", y="count")
+        st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("关键词命中热力")
-    kw_cols = [c for c in df_filtered.columns if c.startswith("kw_")]
     if kw_cols:
-        kw_sum = df_filtered[kw_cols].sum().reset_index()
-        kw_sum.columns = ["keyword", "count"]
         fig2 = px.bar(kw_sum, x="keyword", y="count")
         st.plotly_chart(fig2, use_container_width=True)
 
     st.subheader("Top 5 候选")
-    st.table(df_filtered[["title", "url", "origin", "score"]].head(5))
+    st.table(table.head(5))
 
     # 产地统计与地图
     st.subheader('产地分布（省级）')
-    origin_counts = df_filtered['origin'].fillna('未知').value_counts()
-    origin_df = origin_counts.reset_index()
-    origin_df.columns = ['origin', 'count']
-
-    # 添加经纬度
-    lats = []
-    lons = []
-    for prov in origin_df['origin']:
-        coord = PROVINCE_COORDS.get(prov, (None, None))
-        lats.append(coord[0])
-        lons.append(coord[1])
-    origin_df['lat'] = lats
-    origin_df['lon'] = lons
 
     # 地图可视化：使用 scatter_geo 作为省级热力近似
     map_df = origin_df.dropna(subset=['lat', 'lon'])
@@ -116,5 +338,10 @@ if uploaded is not None:
     fig_pie = px.pie(origin_df, names='origin', values='count')
     st.plotly_chart(fig_pie, use_container_width=True)
 
+    if trend_df is not None and not trend_df.empty:
+        st.subheader('价格趋势（按天/产地）')
+        fig_trend = px.line(trend_df.dropna(subset=['avg_price']), x='day', y='avg_price', color='origin', markers=True)
+        st.plotly_chart(fig_trend, use_container_width=True)
+
 else:
-    st.info("请先运行爬虫与分析，上传生成的 analysis_output.json 文件。")
+    st.info("请先运行爬虫与分析，上传生成的 analysis_output.json（或 .parquet）文件，或选择历史库（抓取任务会自动导入）。")
@@ -0,0 +1,116 @@
+"""
+详情页字段抽取规则：字段 -> 有序选择器列表 -> 后处理器。
+
+规则从 JSON 文件加载（默认 extract_spec.json），站点结构变化时只需修改配置文件。
+抽取时把整个规则一次性传入 page.evaluate，在页面内完成所有选择器查询并连同 body 文本、
+document.title 一起返回，整个详情页只需一次 CDP 往返。
+
+配置示例：
+{
+  "price": {"selectors": [".price", ".goods-price"], "post": "price", "ready": true}
+}
+- selectors：按顺序尝试，取第一个经后处理后非空的值
+- post：后处理器名称（由调用方提供实现，例如 text / price）
+- ready：该字段的选择器是否用于页面就绪判定
+- json：从接口 JSON 中抽取时该字段可能使用的键（按顺序尝试），见 network_capture.find_product
+- json_scale：数值键的换算系数，例如以分为单位的价格 {"min_price": 0.01}
+"""
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+
+DEFAULT_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extract_spec.json')
+
+# 在页面内执行：对每个字段的每个选择器取第一个匹配元素的 innerText（不存在为 null）
+EXTRACT_JS = """
+(spec) => {
+    const fields = {};
+    for (const [name, selectors] of Object.entries(spec)) {
+        fields[name] = selectors.map((sel) => {
+            try {
+                const el = document.querySelector(sel);
+                return el ? el.innerText : null;
+            } catch (e) {
+                return null;
+            }
+        });
+    }
+    return {
+        fields: fields,
+        document_title: document.title || '',
+        body: document.body ? document.body.innerText : '',
+    };
+}
+"""
+
+_default_spec = None
+
+
+class ExtractionSpec:
+    def __init__(self, fields: Dict[str, dict]):
+        self.fields = {}
+        for name, cfg in fields.items():
+            self.fields[name] = {
+                'selectors': list(cfg.get('selectors', [])),
+                'post': cfg.get('post', 'text'),
+                'ready': bool(cfg.get('ready', False)),
+                'json': list(cfg.get('json', [])),
+                'json_scale': dict(cfg.get('json_scale', {})),
+            }
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'ExtractionSpec':
+        with open(path or DEFAULT_SPEC_PATH, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @property
+    def ready_selectors(self) -> List[str]:
+        out = []
+        for cfg in self.fields.values():
+            if cfg['ready']:
+                out.extend(cfg['selectors'])
+        return out
+
+    @property
+    def json_keys(self) -> Dict[str, List[str]]:
+        return {name: cfg['json'] for name, cfg in self.fields.items() if cfg['json']}
+
+    async def evaluate(self, page) -> dict:
+        """一次 page.evaluate 取回所有字段的候选文本、document.title 与 body 文本。"""
+        return await page.evaluate(EXTRACT_JS, {name: cfg['selectors'] for name, cfg in self.fields.items()})
+
+    def apply(self, raw: dict, postprocessors: Dict[str, Callable]) -> dict:
+        """对 evaluate 的结果逐字段按顺序后处理，取第一个非空值；没有命中的字段为 None。"""
+        out = {}
+        for name, cfg in self.fields.items():
+            post = postprocessors[cfg['post']]
+            value = None
+            for txt in raw.get('fields', {}).get(name) or []:
+                if not txt:
+                    continue
+                value = post(txt)
+                if value not in (None, ''):
+                    break
+                value = None
+            out[name] = value
+        return out
+
+    def apply_json(self, found: Dict[str, tuple], postprocessors: Dict[str, Callable]) -> dict:
+        """对 find_product 的结果逐字段换算/后处理：数值按 json_scale 换算，字符串交给该字段的后处理器。"""
+        out = {}
+        for name, cfg in self.fields.items():
+            key, value = found.get(name, (None, None))
+            if isinstance(value, (int, float)):
+                value = round(value * cfg['json_scale'].get(key, 1), 2)
+            elif value is not None:
+                value = postprocessors[cfg['post']](str(value))
+            out[name] = None if value == '' else value
+        return out
+
+
+def get_default_spec() -> ExtractionSpec:
+    global _default_spec
+    if _default_spec is None:
+        _default_spec = ExtractionSpec.load()
+    return _default_spec
@@ -0,0 +1,124 @@
+"""
+详情页抓取缓存：基于 SQLite，按规范化后的 URL 保存抽取结果（含 scrape_time）。
+
+- 在访问详情页前查询缓存，未过期（TTL）的记录直接复用，不再打开页面
+- 条目数超过 max_entries 时按最近访问时间淘汰（LRU）
+- 统计命中/未命中次数
+- 使用 WAL 模式，多个 worker 进程可共享同一个缓存文件
+
+用法示例：
+cache = FetchCache('data/fetch_cache.db', ttl_seconds=24 * 3600)
+record = cache.get(url)
+if record is None:
+    record = await fetch_detail(page, url)
+    cache.put(url, record)
+print(cache.summary())
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+DEFAULT_CACHE_PATH = os.getenv('FETCH_CACHE_PATH', os.path.join('data', 'fetch_cache.db'))
+DEFAULT_TTL_SECONDS = int(os.getenv('FETCH_CACHE_TTL', str(24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv('FETCH_CACHE_MAX_ENTRIES', '100000'))
+
+# 不影响页面内容的跟踪/来源参数，规范化时去掉
+TRACKING_PARAM_PREFIXES = ('utm_', 'spm', 'share_', 'enter_from', 'previous_page')
+
+# 每写入多少次检查一次是否需要淘汰
+EVICT_EVERY = 100
+
+_caches = {}
+
+
+def normalize_url(url: str) -> str:
+    """去掉 fragment 与跟踪参数、统一 scheme/host 大小写并对 query 排序，使同一商品的不同链接得到相同的 key。"""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAM_PREFIXES)]
+    query.sort()
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+class FetchCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS fetch_cache ('
+            ' url TEXT PRIMARY KEY,'
+            ' record TEXT NOT NULL,'
+            ' fetched_at REAL NOT NULL,'
+            ' last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_fetch_cache_last_access ON fetch_cache (last_access)')
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[dict]:
+        key = normalize_url(url)
+        now = time.time()
+        row = self._conn.execute('SELECT record, fetched_at FROM fetch_cache WHERE url = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        record, fetched_at = row
+        if now - fetched_at > self.ttl_seconds:
+            self._conn.execute('DELETE FROM fetch_cache WHERE url = ?', (key,))
+            self._conn.commit()
+            self.misses += 1
+            return None
+        self._conn.execute('UPDATE fetch_cache SET last_access = ? WHERE url = ?', (now, key))
+        self._conn.commit()
+        self.hits += 1
+        return json.loads(record)
+
+    def put(self, url: str, record: dict):
+        now = time.time()
+        self._conn.execute(
+            'INSERT OR REPLACE INTO fetch_cache (url, record, fetched_at, last_access) VALUES (?, ?, ?, ?)',
+            (normalize_url(url), json.dumps(record, ensure_ascii=False), now, now),
+        )
+        self._conn.commit()
+        self._puts += 1
+        if self._puts % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """删除过期条目，并按最近访问时间淘汰超出 max_entries 的部分。"""
+        self._conn.execute('DELETE FROM fetch_cache WHERE fetched_at < ?', (time.time() - self.ttl_seconds,))
+        self._conn.execute(
+            'DELETE FROM fetch_cache WHERE url IN ('
+            ' SELECT url FROM fetch_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f'hits={self.hits} misses={self.misses} hit_rate={rate:.0%}'
+
+    def close(self):
+        self._conn.close()
+
+
+def get_fetch_cache(path: str = DEFAULT_CACHE_PATH) -> FetchCache:
+    """返回当前进程内按路径共享的缓存实例。"""
+    cache = _caches.get(path)
+    if cache is None:
+        cache = FetchCache(path)
+        _caches[path] = cache
+    return cache
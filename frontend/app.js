@@ -8,7 +8,50 @@ async function startScrape(){
   const res = await fetch('/scrape', { method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify(body) })
   const j = await res.json()
   document.getElementById('status').innerText = 'Task queued: ' + j.celery_id
-  pollStatus(j.celery_id)
+  watchProgress(j.celery_id)
+}
+
+// 通过 Server-Sent Events 接收任务进度；浏览器不支持或连接失败时退回轮询 /status
+function watchProgress(id){
+  if(!window.EventSource){
+    pollStatus(id)
+    return
+  }
+  const s = document.getElementById('status')
+  const r = document.getElementById('result')
+  const es = new EventSource('/events/' + id)
+  let received = false
+  const render = (ev) => {
+    received = true
+    const e = JSON.parse(ev.data)
+    const c = e.counts || {}
+    const stage = e.stage ? ' | ' + e.stage + (e.keyword ? ' (' + e.keyword + ')' : '') : ''
+    s.innerText = 'State: ' + e.event + stage + ' | links ' + (c.discovered || 0) + ', fetched ' + (c.fetched || 0) + ' (cached ' + (c.cached || 0) + '), failed ' + (c.failed || 0)
+    if(e.stages_ms && Object.keys(e.stages_ms).length){
+      s.innerText += ' | ' + Object.entries(e.stages_ms).map(([k, v]) => k + ' ' + (v / 1000).toFixed(1) + 's').join(', ')
+    }
+  }
+  for(const name of ['stage', 'links', 'fetched', 'failed', 'keyword_done']){
+    es.addEventListener(name, render)
+  }
+  es.addEventListener('done', (ev) => {
+    render(ev)
+    es.close()
+    r.innerText = 'Result: ' + JSON.stringify(JSON.parse(ev.data).result || {})
+  })
+  es.addEventListener('error', (ev) => {
+    // 服务端发送的 error 事件带 data；连接错误没有 data
+    if(ev.data){
+      render(ev)
+      es.close()
+      r.innerText = 'Error: ' + JSON.parse(ev.data).error
+      return
+    }
+    if(!received){
+      es.close()
+      pollStatus(id)
+    }
+  })
 }
 
 async function pollStatus(id){
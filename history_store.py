@@ -0,0 +1,185 @@
+"""
+历史结果库：把每次抓取任务的记录追加写入同一个 SQLite 库，用于跨任务、跨月份分析价格/产地趋势。
+
+- 只追加：同一 URL 在同一 scrape_time 的记录只保存一次（重复导入、断点续传、缓存复用的记录不会重复计数）
+- 按天分区：每条记录带 day 列（scrape_time 的日期），(day, keyword) 与 scrape_time 上有索引，
+  时间窗口查询只扫描窗口内的索引范围，不读取窗口外的记录
+- 另有 url（规范化后）与 keyword 索引，便于查看单个商品的历史与按关键词筛选
+- query() 返回 DataFrame，供分析（SimpleAnalysisAgent.load_history）与 Dashboard 使用；
+  daily_stats() 在库内按天/产地聚合价格与条数
+
+用法示例：
+store = HistoryStore('data/history.db')
+store.ingest_file('data/xxx_scrape.json', task_id='xxx')
+df = store.query(start='2025-08-01', keywords=['核桃'], origins=['新疆维吾尔自治区'])
+trend = store.daily_stats(keywords=['核桃'])
+"""
+import os
+import sqlite3
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from fetch_cache import normalize_url
+from record_io import iter_dataframes
+
+
+DEFAULT_HISTORY_PATH = os.getenv('HISTORY_STORE_PATH', os.path.join('data', 'history.db'))
+
+HISTORY_COLUMNS = ['url', 'keyword', 'title', 'price', 'origin', 'shop_name', 'scrape_time', 'raw_text_snippet', 'task_id']
+
+_stores = {}
+
+
+def _iso(value) -> Optional[str]:
+    # 统一为无时区的 ISO 字符串（UTC），保证按字符串比较即按时间比较
+    if value is None or value == '':
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return None
+    if pd.isna(ts):
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return ts.isoformat()
+
+
+def _price(value) -> Optional[float]:
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if price != price else price
+
+
+class HistoryStore:
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS records ('
+            ' id INTEGER PRIMARY KEY,'
+            ' url TEXT NOT NULL,'
+            ' norm_url TEXT NOT NULL,'
+            ' keyword TEXT NOT NULL DEFAULT \'\','
+            ' title TEXT,'
+            ' price REAL,'
+            ' origin TEXT,'
+            ' shop_name TEXT,'
+            ' scrape_time TEXT NOT NULL,'
+            ' day TEXT NOT NULL,'
+            ' raw_text_snippet TEXT,'
+            ' task_id TEXT,'
+            ' UNIQUE (norm_url, scrape_time))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_day_keyword ON records (day, keyword)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_scrape_time ON records (scrape_time)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_keyword_time ON records (keyword, scrape_time)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_url ON records (norm_url, scrape_time)')
+        self._conn.commit()
+
+    def ingest(self, records: Iterable[dict], task_id: Optional[str] = None) -> int:
+        """追加写入记录，返回新增条数（已存在的 URL+scrape_time 忽略）。"""
+        rows = []
+        for r in records:
+            url = r.get('url')
+            scrape_time = _iso(r.get('scrape_time'))
+            if not url or scrape_time is None:
+                continue
+            rows.append((url, normalize_url(url), r.get('keyword') or '', r.get('title'), _price(r.get('price')),
+                         r.get('origin') or '', r.get('shop_name'), scrape_time, scrape_time[:10],
+                         r.get('raw_text_snippet'), task_id))
+        if not rows:
+            return 0
+        before = self._conn.total_changes
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO records (url, norm_url, keyword, title, price, origin, shop_name, scrape_time, day, raw_text_snippet, task_id)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            rows,
+        )
+        self._conn.commit()
+        return self._conn.total_changes - before
+
+    def ingest_file(self, path: str, task_id: Optional[str] = None, chunksize: int = 50000) -> int:
+        """导入一个抓取结果文件（JSON / NDJSON / Parquet），按块读取。"""
+        added = 0
+        for chunk in iter_dataframes(path, chunksize=chunksize):
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            added += self.ingest(chunk.to_dict(orient='records'), task_id=task_id)
+        return added
+
+    def _where(self, start=None, end=None, keywords: Optional[List[str]] = None, origins: Optional[List[str]] = None, url: Optional[str] = None):
+        clauses, params = [], []
+        # 同时给出 day 与 scrape_time 条件：day 用于命中 (day, keyword) 索引，scrape_time 做精确边界
+        if start is not None:
+            start = _iso(start)
+            clauses += ['day >= ?', 'scrape_time >= ?']
+            params += [start[:10], start]
+        if end is not None:
+            end_ts = pd.Timestamp(end)
+            if end_ts == end_ts.normalize() and len(str(end)) <= 10:
+                # 只给日期时包含当天全天
+                end_ts = end_ts + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+            end = _iso(end_ts)
+            clauses += ['day <= ?', 'scrape_time <= ?']
+            params += [end[:10], end]
+        if keywords:
+            clauses.append(f'keyword IN ({", ".join("?" * len(keywords))})')
+            params += list(keywords)
+        if origins:
+            clauses.append(f'origin IN ({", ".join("?" * len(origins))})')
+            params += list(origins)
+        if url:
+            clauses.append('norm_url = ?')
+            params.append(normalize_url(url))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, start=None, end=None, keywords: Optional[List[str]] = None, origins: Optional[List[str]] = None, url: Optional[str] = None, columns: Optional[List[str]] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        """按时间窗口/关键词/产地/URL 查询，按 scrape_time 升序返回。"""
+        cols = [c for c in (columns or HISTORY_COLUMNS) if c in HISTORY_COLUMNS]
+        where, params = self._where(start, end, keywords, origins, url)
+        sql = f'SELECT {", ".join(cols)} FROM records{where} ORDER BY scrape_time'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        df = pd.read_sql_query(sql, self._conn, params=params)
+        if 'scrape_time' in df.columns:
+            df['scrape_time'] = pd.to_datetime(df['scrape_time'])
+        return df
+
+    def daily_stats(self, start=None, end=None, keywords: Optional[List[str]] = None, origins: Optional[List[str]] = None) -> pd.DataFrame:
+        """按天、产地聚合：条数、均价、最低价、最高价。"""
+        where, params = self._where(start, end, keywords, origins)
+        sql = ('SELECT day, origin, COUNT(*) AS count, AVG(price) AS avg_price, MIN(price) AS min_price, MAX(price) AS max_price'
+               f' FROM records{where} GROUP BY day, origin ORDER BY day, origin')
+        df = pd.read_sql_query(sql, self._conn, params=params)
+        df['day'] = pd.to_datetime(df['day'])
+        return df
+
+    def keywords(self) -> List[str]:
+        return [row[0] for row in self._conn.execute('SELECT DISTINCT keyword FROM records ORDER BY keyword')]
+
+    def time_range(self):
+        """返回 (最早, 最晚) scrape_time，库为空时为 (None, None)。"""
+        lo, hi = self._conn.execute('SELECT MIN(scrape_time), MAX(scrape_time) FROM records').fetchone()
+        return (pd.Timestamp(lo) if lo else None, pd.Timestamp(hi) if hi else None)
+
+    def count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def get_history_store(path: str = DEFAULT_HISTORY_PATH) -> HistoryStore:
+    """返回当前进程内按路径共享的历史库实例。"""
+    store = _stores.get(path)
+    if store is None:
+        store = HistoryStore(path)
+        _stores[path] = store
+    return store
@@ -0,0 +1,113 @@
+"""
+轻量 HTTP 抓取层：在启动浏览器之前先用异步 HTTP 客户端直接请求页面。
+
+- 一个 httpx.AsyncClient 复用连接池（HTTP/2 + keep-alive），同时进行的请求数不超过 concurrency
+- 与浏览器共用按域名的限速器；403/429 或验证码页抛出 BlockedError
+- 只负责取回 HTML，解析由调用方完成（例如 playwright_scraper.parse_detail_html），
+  必要字段缺失时调用方再升级到 Playwright
+
+用法示例：
+async with HttpFetcher(concurrency=8) as http:
+    html = await http.fetch(url)
+print(http.summary())
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from rate_limiter import BlockedError, RateLimiter, BLOCK_STATUS, looks_blocked
+
+
+DEFAULT_HTTP_CONCURRENCY = int(os.getenv('HTTP_FETCH_CONCURRENCY', '8'))
+DEFAULT_HTTP_TIMEOUT = float(os.getenv('HTTP_FETCH_TIMEOUT', '15'))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9',
+}
+
+
+def cookies_from_playwright(cookies: List[dict]) -> httpx.Cookies:
+    """把 Playwright 格式的 cookies（--cookies 文件内容）转换为 httpx.Cookies。"""
+    jar = httpx.Cookies()
+    for c in cookies:
+        if 'name' in c and 'value' in c:
+            jar.set(c['name'], c['value'], domain=c.get('domain', ''), path=c.get('path', '/'))
+    return jar
+
+
+class HttpFetcher:
+    def __init__(self, concurrency: int = DEFAULT_HTTP_CONCURRENCY, timeout: float = DEFAULT_HTTP_TIMEOUT, proxy: Optional[str] = None, cookies: Optional[List[dict]] = None, headers: Optional[Dict[str, str]] = None, limiter: Optional[RateLimiter] = None):
+        self.concurrency = max(1, concurrency)
+        self.limiter = limiter
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._client = httpx.AsyncClient(
+            http2=True,
+            proxy=proxy,
+            timeout=timeout,
+            follow_redirects=True,
+            headers=headers or DEFAULT_HEADERS,
+            cookies=cookies_from_playwright(cookies) if cookies else None,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        self.stats = {'ok': 0, 'error': 0, 'blocked': 0}
+        # 页面取回但必要字段缺失、由调用方升级到浏览器的次数
+        self.incomplete = 0
+        self.elapsed = 0.0
+
+    async def fetch(self, url: str) -> str:
+        """请求 url 并返回 HTML 文本；HTTP 错误抛出 httpx.HTTPStatusError，反爬页面抛出 BlockedError。"""
+        async with self._semaphore:
+            if self.limiter is not None:
+                await self.limiter.acquire(url)
+            started = time.monotonic()
+            try:
+                resp = await self._client.get(url)
+                if resp.status_code in BLOCK_STATUS:
+                    raise BlockedError(f'HTTP {resp.status_code}')
+                resp.raise_for_status()
+                text = resp.text
+                if looks_blocked(text[:2000]):
+                    raise BlockedError('captcha or rate-limit page')
+            except Exception as e:
+                blocked = isinstance(e, BlockedError)
+                self.stats['blocked' if blocked else 'error'] += 1
+                if self.limiter is not None:
+                    self.limiter.record(url, ok=False, blocked=blocked)
+                raise
+            finally:
+                self.elapsed += time.monotonic() - started
+            self.stats['ok'] += 1
+            if self.limiter is not None:
+                self.limiter.record(url, ok=True)
+            return text
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def summary(self) -> dict:
+        return summarize_fetchers([self])
+
+
+def summarize_fetchers(fetchers: List[HttpFetcher]) -> dict:
+    """合并多个 HttpFetcher 的统计（例如代理池模式下每个关键词一个客户端）。"""
+    out = {'ok': 0, 'error': 0, 'blocked': 0, 'incomplete': 0}
+    elapsed = 0.0
+    for f in fetchers:
+        for key, count in f.stats.items():
+            out[key] += count
+        out['incomplete'] += f.incomplete
+        elapsed += f.elapsed
+    requests = out['ok'] + out['error'] + out['blocked']
+    out['avg_ms'] = round(elapsed / requests * 1000, 1) if requests else 0.0
+    return out
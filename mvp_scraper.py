@@ -1,19 +1,13 @@
 """
-最小爬虫示例：使用 requests + BeautifulSoup 抓取指定页面的标题和部分文本（用于演示）。
+最小爬虫示例：使用 HttpFetcher + BeautifulSoup 抓取指定页面的标题和部分文本（用于演示）。
 真实环境下建议用 Playwright 并处理反爬措施。
+run() 使用 http_fetcher.HttpFetcher 并发抓取（连接池 + HTTP/2，--concurrency 限制并发数）。
 """
-import requests
+import asyncio
 from bs4 import BeautifulSoup
 import json
 
-
-def fetch_page(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-    resp = requests.get(url, headers=headers, timeout=15)
-    resp.raise_for_status()
-    return resp.text
+from http_fetcher import HttpFetcher, DEFAULT_HTTP_CONCURRENCY
 
 
 def parse_service_page(html, url):
@@ -37,24 +31,29 @@ def parse_service_page(html, url):
     }
 
 
-def run(urls, out_path):
-    results = []
-    for u in urls:
-        try:
-            html = fetch_page(u)
-            data = parse_service_page(html, u)
-            results.append(data)
-        except Exception as e:
-            print(f"Failed to fetch {u}: {e}")
+async def fetch_all(urls, concurrency=DEFAULT_HTTP_CONCURRENCY):
+    async with HttpFetcher(concurrency=concurrency) as http:
+        async def one(u):
+            try:
+                return parse_service_page(await http.fetch(u), u)
+            except Exception as e:
+                print(f"Failed to fetch {u}: {e}")
+                return None
+        results = await asyncio.gather(*(one(u) for u in urls))
+    return [r for r in results if r is not None]
+
+
+def run(urls, out_path, concurrency=DEFAULT_HTTP_CONCURRENCY):
+    results = asyncio.run(fetch_all(urls, concurrency))
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
 
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) < 3:
-        print("Usage: python mvp_scraper.py <out.json> <url1> [url2 ...]")
-    else:
-        out = sys.argv[1]
-        urls = sys.argv[2:]
-        run(urls, out)
+    import argparse
+    ap = argparse.ArgumentParser(description="fetch pages over HTTP and save their title and text snippet")
+    ap.add_argument("out", help="output json path")
+    ap.add_argument("urls", nargs="+")
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_HTTP_CONCURRENCY, help="max concurrent requests")
+    args = ap.parse_args()
+    run(args.urls, args.out, concurrency=args.concurrency)
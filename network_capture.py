@@ -0,0 +1,203 @@
+"""
+网络响应捕获：监听页面自身发出的 XHR/fetch 请求的 JSON 响应，直接从接口数据中取值，代替解析渲染后的 DOM。
+
+- ResponseCapture 挂在 page 的 response 事件上，只保留 URL 命中 url_patterns 且内容为 JSON 的响应
+- 响应体异步读取并解析，drain() 等待已到达响应的解析完成
+- find_urls() 递归遍历 JSON，收集满足条件的 URL 字符串（例如搜索接口返回的商品链接）
+- find_product() 在 JSON 中定位商品对象，按字段别名（extract_spec.json 中各字段的 json 列表）取 title/price/origin/shop_name
+- parse_embedded_json() 解析页面内嵌的 JSON 数据（<script> 中的 JSON 或 URL 编码的 JSON，例如 RENDER_DATA）
+
+用法示例：
+capture = ResponseCapture(SEARCH_API_PATTERNS)
+capture.attach(page)
+await page.goto(search_url)
+await capture.drain()
+links = find_urls(capture.take(), is_product_link)
+capture.detach()
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+
+# 抖音搜索页使用的搜索接口（可能随站点改版变化，可通过构造参数覆盖）
+SEARCH_API_PATTERNS = ('/aweme/v1/web/search/', '/aweme/v1/web/general/search', '/search/item', '/search/product', '/ecom/search')
+
+# 商品详情页加载商品信息的接口
+DETAIL_API_PATTERNS = ('/ecom/product/detail', '/product/detail', '/goods/detail', '/item/detail', '/pack_detail', '/aweme/v1/web/aweme/detail')
+
+PRODUCT_LINK_MARKERS = ('/goods/', '/item/', 'shop.douyin.com', '/product')
+
+# 单个响应体最大解析字节数，避免误捕获大文件
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+
+def is_product_link(url: str) -> bool:
+    return bool(url) and url.startswith(('http://', 'https://')) and any(k in url for k in PRODUCT_LINK_MARKERS)
+
+
+def find_urls(payloads: Iterable[Any], predicate: Callable[[str], bool] = is_product_link) -> List[str]:
+    """按出现顺序返回 JSON 中所有满足 predicate 的字符串（去重）。"""
+    found = {}
+    stack = list(payloads)[::-1]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, str) and predicate(node):
+            found.setdefault(node, None)
+    return list(found)
+
+
+def _scalar(value) -> bool:
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool) and value != ''
+
+
+def _iter_dicts(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _lookup(node: dict, keys: List[str]) -> Optional[Tuple[str, Any]]:
+    for key in keys:
+        value = node.get(key)
+        if _scalar(value):
+            return key, value
+    return None
+
+
+def find_product(payloads: Iterable[Any], field_keys: Dict[str, List[str]]) -> Tuple[Dict[str, Tuple[str, Any]], Optional[dict]]:
+    """在 JSON 中找命中字段最多（且包含 title）的对象作为商品，返回 ({字段: (命中的键, 原始值)}, 商品对象)。
+
+    商品对象本身缺少的字段（例如嵌套在 shop 对象里的店铺名）在其子对象中按顺序查找。
+    """
+    best, best_hits = None, 0
+    for payload in payloads:
+        for node in _iter_dicts(payload):
+            hits = sum(1 for keys in field_keys.values() if _lookup(node, keys))
+            if hits > best_hits and ('title' not in field_keys or _lookup(node, field_keys['title'])):
+                best, best_hits = node, hits
+    if best is None:
+        return {}, None
+    found = {}
+    for name, keys in field_keys.items():
+        for node in _iter_dicts(best):
+            hit = _lookup(node, keys)
+            if hit:
+                found[name] = hit
+                break
+    return found, best
+
+
+def json_text(node, limit: int = 1000) -> str:
+    """JSON 中的全部字符串按顺序拼接，作为 raw_text_snippet 代替页面正文。"""
+    parts, size = [], 0
+    stack = [node]
+    while stack and size < limit:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, str) and node and not node.startswith(('http://', 'https://')):
+            parts.append(node)
+            size += len(node) + 1
+    return '\n'.join(parts)[:limit]
+
+
+def parse_embedded_json(text: str) -> Optional[Any]:
+    """解析 <script> 中的 JSON（也支持整段 URL 编码的 JSON）；不是 JSON 时返回 None。"""
+    text = (text or '').strip()
+    if text.startswith('%7B') or text.startswith('%5B'):
+        text = unquote(text)
+    if not text.startswith(('{', '[')):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class ResponseCapture:
+    def __init__(self, url_patterns: Iterable[str]):
+        self.url_patterns = tuple(url_patterns)
+        self.responses = 0
+        self._payloads: List[Any] = []
+        self._pending = set()
+        self._page = None
+        self._arrived: Optional[asyncio.Event] = None
+
+    def _wanted(self, response) -> bool:
+        if not any(p in response.url for p in self.url_patterns):
+            return False
+        content_type = (response.headers or {}).get('content-type', '')
+        return 'json' in content_type or 'javascript' in content_type or 'text/plain' in content_type
+
+    def _on_response(self, response):
+        if not self._wanted(response):
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read(self, response):
+        try:
+            body = await response.body()
+        except Exception:
+            # 页面跳转后响应体可能已不可读
+            return
+        if not body or len(body) > MAX_BODY_BYTES:
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return
+        self.responses += 1
+        self._payloads.append(payload)
+        if self._arrived is not None:
+            self._arrived.set()
+
+    def attach(self, page):
+        self._page = page
+        page.on('response', self._on_response)
+
+    def detach(self):
+        if self._page is not None:
+            self._page.remove_listener('response', self._on_response)
+            self._page = None
+
+    async def drain(self, timeout: Optional[float] = 2.0):
+        """等待已到达响应的读取/解析完成。"""
+        if self._pending:
+            await asyncio.wait(list(self._pending), timeout=timeout)
+
+    async def wait_for(self, predicate: Callable[[List[Any]], Any], timeout: float):
+        """等待直到 predicate(已捕获的 JSON 列表) 返回真值并返回该值，超时返回最后一次的结果。"""
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+        if self._arrived is None:
+            self._arrived = asyncio.Event()
+        while True:
+            self._arrived.clear()
+            result = predicate(self._payloads) if self._payloads else None
+            remaining = deadline - loop.time()
+            if result or remaining <= 0:
+                return result
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def take(self) -> List[Any]:
+        """取出目前捕获到的 JSON（取出后清空）。"""
+        payloads, self._payloads = self._payloads, []
+        return payloads
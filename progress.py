@@ -0,0 +1,236 @@
+"""
+任务进度事件：抓取任务通过 Redis pub/sub 发布细粒度进度，API 订阅后以 SSE/WebSocket 推给前端，代替轮询 /status。
+
+- ProgressReporter 在任务进程内累计计数（发现链接、已抓取、缓存命中、失败）与各阶段耗时，
+  每个事件都携带完整的累计快照，客户端只需显示最新一条；抓取/失败类事件按 min_interval 节流
+- 最新快照同时写入 progress:{task_id}:last（带过期时间），晚于事件订阅的客户端先拿到当前状态
+- 发布不阻塞抓取：publish() 只把消息放入有界队列，由每个进程一个的后台线程写 Redis（超时 PUBLISH_TIMEOUT 秒），
+  队列满时丢弃新事件（每个事件都是完整快照）；done/error 发布后最多等待 FLUSH_TIMEOUT 秒让队列写完
+- subscribe() 为 API 侧的异步迭代器，收到 done/error 事件后结束
+- Redis 暂时不可用时丢弃事件并记录一次警告（logging），按指数退避（PUBLISH_RETRY_SECONDS 起，最长 PUBLISH_MAX_RETRY_SECONDS），
+  退避期间到达的事件直接丢弃（done/error 仍会尝试发送），到期后恢复发布；不影响抓取本身，也不会让同一 worker 之后的任务失去进度事件
+
+用法示例：
+progress = ProgressReporter(task_id)
+with progress.stage('scrape'):
+    run(..., progress=progress)
+progress.done({'analysis': analysis_out})
+
+async for event in subscribe(task_id):
+    ...
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Optional
+
+
+DEFAULT_PROGRESS_REDIS_URL = os.getenv('PROGRESS_REDIS_URL', os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'))
+# 抓取/失败类事件的最小发布间隔（秒）
+DEFAULT_MIN_INTERVAL = float(os.getenv('PROGRESS_MIN_INTERVAL', '0.5'))
+# 最新快照保留时间（秒）
+SNAPSHOT_TTL_SECONDS = int(os.getenv('PROGRESS_SNAPSHOT_TTL', str(24 * 3600)))
+# 后台线程连接/读写 Redis 的超时（秒）
+PUBLISH_TIMEOUT = float(os.getenv('PROGRESS_PUBLISH_TIMEOUT', '0.5'))
+# 任务结束时等待未发布事件写完的最长时间（秒）
+FLUSH_TIMEOUT = float(os.getenv('PROGRESS_FLUSH_TIMEOUT', '2'))
+PUBLISH_QUEUE_SIZE = 1000
+# 发布失败后暂停发布的秒数（连续失败时翻倍，最长 PUBLISH_MAX_RETRY_SECONDS）
+PUBLISH_RETRY_SECONDS = float(os.getenv('PROGRESS_PUBLISH_RETRY', '1'))
+PUBLISH_MAX_RETRY_SECONDS = float(os.getenv('PROGRESS_PUBLISH_MAX_RETRY', '30'))
+
+CHANNEL_PREFIX = 'progress:'
+TERMINAL_EVENTS = ('done', 'error')
+
+logger = logging.getLogger(__name__)
+
+_publishers = {}
+
+
+def channel_for(task_id: str) -> str:
+    return f'{CHANNEL_PREFIX}{task_id}'
+
+
+class _Publisher:
+    """后台线程按顺序把事件写入 Redis；submit() 只入队，不等待网络往返。"""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        # 发布失败后的退避：retry_at 之前到达的事件直接丢弃
+        self.retry_at = 0.0
+        self.backoff = 0.0
+        self._queue = queue.Queue(maxsize=PUBLISH_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, channel: str, message: str, force: bool = False):
+        """入队一个事件，不等待写入 Redis；force=True 的事件（done/error）在退避期间也尝试发送。"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='progress-publisher', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((channel, message, force))
+        except queue.Full:
+            # Redis 跟不上时丢弃该事件，之后的事件携带完整快照
+            pass
+
+    def _run(self):
+        import redis
+        client = redis.Redis.from_url(self.redis_url, socket_connect_timeout=PUBLISH_TIMEOUT, socket_timeout=PUBLISH_TIMEOUT)
+        while True:
+            channel, message, force = self._queue.get()
+            try:
+                if force or time.monotonic() >= self.retry_at:
+                    self._send(client, channel, message)
+            finally:
+                self._queue.task_done()
+
+    def _send(self, client, channel: str, message: str):
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.publish(channel, message)
+            pipe.set(channel + ':last', message, ex=SNAPSHOT_TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            # 视为暂时故障：丢弃该事件，退避后再试（连接池会重新建立连接）
+            if not self.backoff:
+                logger.warning('progress publish to %s failed, dropping events and retrying with backoff: %s', self.redis_url, e)
+            self.backoff = min(self.backoff * 2 or PUBLISH_RETRY_SECONDS, PUBLISH_MAX_RETRY_SECONDS)
+            self.retry_at = time.monotonic() + self.backoff
+            return
+        if self.backoff:
+            logger.info('progress publish to %s recovered', self.redis_url)
+            self.backoff = 0.0
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        """等待已入队的事件写完，返回是否在 timeout 秒内完成。"""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+
+def _publisher(redis_url: str) -> _Publisher:
+    # 每个进程每个 URL 一个发布线程；按 pid 区分，Celery prefork 子进程不会复用父进程的线程与连接
+    key = (os.getpid(), redis_url)
+    publisher = _publishers.get(key)
+    if publisher is None:
+        publisher = _publishers[key] = _Publisher(redis_url)
+    return publisher
+
+
+class ProgressReporter:
+    def __init__(self, task_id: str, redis_url: str = DEFAULT_PROGRESS_REDIS_URL, min_interval: float = DEFAULT_MIN_INTERVAL):
+        self.task_id = task_id
+        self.redis_url = redis_url
+        self.min_interval = min_interval
+        self.counts = {'discovered': 0, 'fetched': 0, 'cached': 0, 'failed': 0}
+        # 各阶段累计耗时（毫秒），同名阶段（例如每个关键词的 search）累加
+        self.stages = {}
+        self.current_stage = None
+        self.keyword = None
+        self._last_publish = 0.0
+
+    def snapshot(self) -> dict:
+        return {'task_id': self.task_id, 'stage': self.current_stage, 'keyword': self.keyword, 'counts': dict(self.counts), 'stages_ms': dict(self.stages)}
+
+    def publish(self, event: str, **data):
+        """发布一个事件（携带当前快照）：只入队，由后台线程写入 Redis，不阻塞调用方。"""
+        payload = self.snapshot()
+        payload.update(data)
+        payload['event'] = event
+        payload['ts'] = time.time()
+        message = json.dumps(payload, ensure_ascii=False, default=str)
+        _publisher(self.redis_url).submit(channel_for(self.task_id), message, force=event in TERMINAL_EVENTS)
+        self._last_publish = time.monotonic()
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        """等待本进程已入队的事件写入 Redis（最多 timeout 秒）。"""
+        return _publisher(self.redis_url).flush(timeout)
+
+    def _throttled(self, event: str, **data):
+        if time.monotonic() - self._last_publish >= self.min_interval:
+            self.publish(event, **data)
+
+    @contextmanager
+    def stage(self, name: str, keyword: Optional[str] = None):
+        """记录一个阶段的耗时，进入与结束时各发布一次 stage 事件。"""
+        previous = self.current_stage, self.keyword
+        self.current_stage = name
+        if keyword is not None:
+            self.keyword = keyword
+        self.publish('stage', status='started')
+        started = time.monotonic()
+        try:
+            yield self
+        finally:
+            elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed_ms, 1)
+            self.publish('stage', status='finished', elapsed_ms=elapsed_ms)
+            self.current_stage, self.keyword = previous
+
+    def discovered(self, keyword: Optional[str], count: int):
+        self.counts['discovered'] += count
+        self.publish('links', keyword=keyword, new_links=count)
+
+    def fetched(self, url: str, cached: bool = False):
+        self.counts['fetched'] += 1
+        if cached:
+            self.counts['cached'] += 1
+        self._throttled('fetched', url=url)
+
+    def failed(self, url: str, error: str):
+        self.counts['failed'] += 1
+        self._throttled('failed', url=url, error=error[:300])
+
+    def done(self, result: Optional[dict] = None):
+        self.current_stage = None
+        self.publish('done', result=result)
+        # 任务结束前尽量把终止事件送达，订阅方据此结束
+        self.flush()
+
+    def error(self, exc: BaseException):
+        self.publish('error', error=f'{type(exc).__name__}: {exc}'[:1000])
+        self.flush()
+
+
+async def subscribe(task_id: str, redis_url: str = DEFAULT_PROGRESS_REDIS_URL, idle_timeout: float = 15.0) -> AsyncIterator[Optional[dict]]:
+    """依次产出任务的进度事件，先产出最新快照（如有）；idle_timeout 秒内没有事件时产出 None（供调用方发送心跳）。
+
+    收到 done/error 事件后结束。
+    """
+    import redis.asyncio as aioredis
+    client = aioredis.from_url(redis_url)
+    pubsub = client.pubsub()
+    channel = channel_for(task_id)
+    try:
+        # 先订阅再读快照，两者之间发布的事件不会丢失（重复的快照不影响显示）
+        await pubsub.subscribe(channel)
+        last = await client.get(channel + ':last')
+        if last:
+            event = json.loads(last)
+            yield event
+            if event.get('event') in TERMINAL_EVENTS:
+                return
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=idle_timeout)
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message['data'])
+            yield event
+            if event.get('event') in TERMINAL_EVENTS:
+                return
+    finally:
+        await pubsub.unsubscribe(channel)
+        await pubsub.aclose()
+        await client.aclose()
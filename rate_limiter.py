@@ -0,0 +1,201 @@
+"""
+按域名限速与失败重试：代替详情页之间固定的 wait_for_timeout(300) 与"失败即丢弃"。
+
+- 每个域名一个令牌桶（rate 个/秒，容量 burst），同一进程内所有并发页面、所有任务共享；
+  设置 RATE_LIMIT_REDIS_URL 时令牌桶与速率保存在 Redis 中，多个 worker 进程共享
+- 自适应（AIMD）：请求成功时速率加 increase，普通失败乘以 error_factor，
+  遇到验证码/403/429 等反爬信号乘以 block_factor，速率限制在 [min_rate, max_rate]
+- RetryPolicy：失败的链接按指数退避 + 全抖动（full jitter）延迟后重新排队，超过 max_attempts 才放弃
+
+用法示例：
+limiter = get_rate_limiter()
+retry = RetryPolicy(max_attempts=3)
+for attempt in range(retry.max_attempts):
+    await limiter.acquire(url)
+    try:
+        ...
+        limiter.record(url, ok=True)
+        break
+    except BlockedError:
+        limiter.record(url, ok=False, blocked=True)
+    await asyncio.sleep(retry.delay(attempt + 1))
+print(limiter.summary())
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+DEFAULT_RATE = float(os.getenv('RATE_LIMIT_PER_DOMAIN', '2'))
+DEFAULT_BURST = float(os.getenv('RATE_LIMIT_BURST', '4'))
+DEFAULT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+
+# 页面标题/正文中出现这些文字时视为被反爬拦截（验证码页、频率限制页）
+BLOCK_MARKERS = ('验证码', '安全验证', '滑块验证', '访问过于频繁', '请求过于频繁', 'captcha', 'verify you are human')
+BLOCK_STATUS = (403, 429)
+
+_limiters = {}
+
+
+class BlockedError(RuntimeError):
+    """页面返回了验证码/频率限制等反爬响应。"""
+
+
+def looks_blocked(*texts: Optional[str]) -> bool:
+    for text in texts:
+        if text:
+            lower = text[:2000].lower()
+            if any(marker in lower for marker in BLOCK_MARKERS):
+                return True
+    return False
+
+
+def domain_of(url: str) -> str:
+    return (urlparse(url).hostname or '').lower()
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 2.0, max_delay: float = 60.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待秒数：在 [0, min(max_delay, base_delay * 2^(attempt-1))] 内均匀随机。"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** max(attempt - 1, 0))))
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+
+class RateLimiter:
+    """进程内按域名的自适应令牌桶。"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST, min_rate: float = 0.2, max_rate: float = 10.0, increase: float = 0.1, error_factor: float = 0.8, block_factor: float = 0.5):
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.error_factor = error_factor
+        self.block_factor = block_factor
+        self._buckets: Dict[str, _Bucket] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _bucket(self, domain: str) -> _Bucket:
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = self._buckets[domain] = _Bucket(self.initial_rate, self.burst)
+        return bucket
+
+    def _reserve(self, domain: str) -> float:
+        # 预约一个令牌并返回需要等待的秒数；令牌可以为负，等待者按预约顺序依次放行
+        bucket = self._bucket(domain)
+        now = time.monotonic()
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+        bucket.updated = now
+        bucket.tokens -= 1
+        return 0.0 if bucket.tokens >= 0 else -bucket.tokens / bucket.rate
+
+    async def acquire(self, url: str):
+        wait = self._reserve(domain_of(url))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _adapt(self, rate: float, ok: bool, blocked: bool) -> float:
+        if ok:
+            rate += self.increase
+        else:
+            rate *= self.block_factor if blocked else self.error_factor
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def _count(self, domain: str, ok: bool, blocked: bool):
+        counts = self.stats.setdefault(domain, {'ok': 0, 'error': 0, 'blocked': 0})
+        counts['ok' if ok else ('blocked' if blocked else 'error')] += 1
+
+    def record(self, url: str, ok: bool, blocked: bool = False):
+        """反馈一次请求结果，调整该域名的速率。"""
+        domain = domain_of(url)
+        self._count(domain, ok, blocked)
+        bucket = self._bucket(domain)
+        bucket.rate = self._adapt(bucket.rate, ok, blocked)
+
+    def rate(self, url_or_domain: str) -> float:
+        domain = domain_of(url_or_domain) or url_or_domain
+        return self._bucket(domain).rate
+
+    def summary(self) -> Dict[str, dict]:
+        return {d: dict(c, rate=round(self.rate(d), 2)) for d, c in self.stats.items()}
+
+
+# KEYS[1] 为域名的 hash；ARGV: now, 初始速率, 容量。返回需要等待的秒数（字符串，避免 Lua 把小数截断为整数）
+_RESERVE_LUA = """
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate') or ARGV[2])
+local burst = tonumber(ARGV[3])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or burst)
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or ARGV[1])
+local now = tonumber(ARGV[1])
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate) - 1
+redis.call('HSET', KEYS[1], 'rate', rate, 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+if tokens >= 0 then return '0' end
+return tostring(-tokens / rate)
+"""
+
+# ARGV: 初始速率, 乘数, 增量, 最小速率, 最大速率
+_ADAPT_LUA = """
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate') or ARGV[1])
+rate = math.max(tonumber(ARGV[4]), math.min(tonumber(ARGV[5]), rate * tonumber(ARGV[2]) + tonumber(ARGV[3])))
+redis.call('HSET', KEYS[1], 'rate', rate)
+return tostring(rate)
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """令牌桶与速率保存在 Redis 中，多个进程/机器共享同一域名的限速。"""
+
+    def __init__(self, redis_url: str, prefix: str = 'ratelimit:', **kwargs):
+        import redis.asyncio as aioredis
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self._redis = aioredis.from_url(redis_url)
+        self._reserve_script = self._redis.register_script(_RESERVE_LUA)
+        self._adapt_script = self._redis.register_script(_ADAPT_LUA)
+        self._pending = set()
+
+    async def acquire(self, url: str):
+        # 使用 Redis 服务器时间，避免各机器时钟不一致
+        seconds, micros = await self._redis.time()
+        wait = float(await self._reserve_script(keys=[self.prefix + domain_of(url)], args=[seconds + micros / 1e6, self.initial_rate, self.burst]))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, url: str, ok: bool, blocked: bool = False):
+        domain = domain_of(url)
+        self._count(domain, ok, blocked)
+        factor, increase = (1.0, self.increase) if ok else ((self.block_factor if blocked else self.error_factor), 0.0)
+        task = asyncio.ensure_future(self._adapt_script(keys=[self.prefix + domain], args=[self.initial_rate, factor, increase, self.min_rate, self.max_rate]))
+        # 保留引用直到完成，避免任务被回收
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def summary(self) -> Dict[str, dict]:
+        # 速率保存在 Redis 中，这里只汇总本进程的计数
+        return {d: dict(c) for d, c in self.stats.items()}
+
+
+def get_rate_limiter(redis_url: Optional[str] = DEFAULT_REDIS_URL) -> RateLimiter:
+    """返回当前进程内共享的限速器；设置了 RATE_LIMIT_REDIS_URL 时使用 Redis 版本。"""
+    key = redis_url or ''
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = RedisRateLimiter(redis_url) if redis_url else RateLimiter()
+        _limiters[key] = limiter
+    return limiter
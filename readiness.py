@@ -0,0 +1,108 @@
+"""
+页面就绪等待：用"关键元素出现 / 网络空闲 / 站点自定义判定"代替固定的 wait_for_timeout。
+
+- 任一条件满足即视为就绪并立即返回，页面渲染得快就不再白等
+- 每类页面（label，例如 search / detail）有最长等待时间（ceiling），超时后照常继续抽取
+- 站点判定按域名配置，值为 page.wait_for_function 可执行的 JS 函数字符串
+- 记录每类页面的 time-to-ready，可输出 p50/p90/p99 分位数
+
+用法示例：
+waiter = ReadinessWaiter(ceilings={'detail': 1000}, site_predicates={'haohuo.jinritemai.com': "() => !!document.querySelector('.price')"})
+await waiter.wait(page, 'detail', ['.price', 'h1'])
+print(waiter.report())
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+
+# 默认最长等待时间与原先固定等待时长一致，保证最坏情况下不比原来慢
+DEFAULT_CEILINGS_MS = {
+    'search': 1500,
+    'detail': 1000,
+    # 搜索结果翻页/滚动后等待新结果出现
+    'scroll': 1500,
+    # 拦截模式下从导航开始等待详情接口 JSON 的最长时间，超时后回落到 DOM 抽取
+    'detail_api': 2000,
+}
+
+SEARCH_READY_SELECTORS = ['a[href*="/goods/"]', 'a[href*="/item/"]', 'a[href*="/product"]', 'a[href*="shop.douyin.com"]']
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class ReadinessWaiter:
+    def __init__(self, ceilings: Optional[Dict[str, int]] = None, site_predicates: Optional[Dict[str, str]] = None):
+        self.ceilings = dict(DEFAULT_CEILINGS_MS)
+        self.ceilings.update(ceilings or {})
+        self.site_predicates = dict(site_predicates or {})
+        self.timings: Dict[str, List[float]] = {}
+        self.timeouts: Dict[str, int] = {}
+
+    async def wait(self, page, label: str, selectors: Optional[List[str]] = None, network_idle: bool = False, predicate: Optional[str] = None, arg=None) -> bool:
+        """等待页面就绪，返回是否在 ceiling 内就绪。predicate 为额外的 JS 判定函数，arg 作为其参数传入。"""
+        ceiling_ms = self.ceilings.get(label, 1000)
+        conditions = []
+        if selectors:
+            conditions.append(page.wait_for_selector(', '.join(selectors), state='attached', timeout=ceiling_ms))
+        if predicate:
+            conditions.append(page.wait_for_function(predicate, arg=arg, timeout=ceiling_ms))
+        site_predicate = self.site_predicates.get(urlparse(page.url).hostname or '')
+        if site_predicate:
+            conditions.append(page.wait_for_function(site_predicate, timeout=ceiling_ms))
+        if network_idle:
+            conditions.append(page.wait_for_load_state('networkidle', timeout=ceiling_ms))
+        if not conditions:
+            conditions.append(page.wait_for_load_state('domcontentloaded', timeout=ceiling_ms))
+
+        start = time.monotonic()
+        tasks = [asyncio.ensure_future(c) for c in conditions]
+        ready = False
+        try:
+            for fut in asyncio.as_completed(tasks, timeout=ceiling_ms / 1000):
+                try:
+                    await fut
+                except asyncio.TimeoutError:
+                    raise
+                except Exception:
+                    # 单个条件失败（例如选择器等待超时）不代表其它条件也不满足
+                    continue
+                ready = True
+                break
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.record(label, (time.monotonic() - start) * 1000, ready)
+        return ready
+
+    def record(self, label: str, elapsed_ms: float, ready: bool = True):
+        """记录一次 time-to-ready（也用于不经过 wait() 的就绪判定，例如接口 JSON 到达）。"""
+        self.timings.setdefault(label, []).append(elapsed_ms)
+        if not ready:
+            self.timeouts[label] = self.timeouts.get(label, 0) + 1
+
+    def report(self) -> Dict[str, dict]:
+        out = {}
+        for label, values in self.timings.items():
+            out[label] = {
+                'count': len(values),
+                'timeouts': self.timeouts.get(label, 0),
+                'p50_ms': round(percentile(values, 0.5), 1),
+                'p90_ms': round(percentile(values, 0.9), 1),
+                'p99_ms': round(percentile(values, 0.99), 1),
+                'max_ms': round(max(values), 1),
+            }
+        return out
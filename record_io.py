@@ -0,0 +1,407 @@
+"""
+抓取/分析记录的读写：支持 JSON 数组、NDJSON（JSON Lines，每行一条记录）与 Parquet 三种格式。
+
+- NDJSON 可以边抓取边追加，文件写到一半也能被读取，分析不必等抓取全部完成
+- 读取 NDJSON 时可按 chunksize 分块，配合分块处理可以处理大于内存的文件
+- Parquet 为列式存储，列带类型（price 为浮点、scrape_time 为时间戳、origin/keyword 为字典编码的分类列），
+  读取时支持列裁剪（columns）与谓词下推（filters，例如按日期/产地过滤），只读取需要的数据
+- 支持分页读取（read_page）、按 NDJSON 流式输出任意区间（iter_ndjson_lines）与增量读取正在写入的 NDJSON（NdjsonTailer）
+- 格式默认按扩展名判断：.jsonl / .ndjson 为 NDJSON，.parquet 为 Parquet，其余为 JSON 数组
+
+filters 使用 pyarrow 的写法，例如 [('scrape_time', '>=', pd.Timestamp('2025-08-01')), ('origin', 'in', ['新疆维吾尔自治区'])]；
+JSON/NDJSON 不支持下推，读取后在 pandas 中按同样的条件过滤。
+
+用法示例：
+with NdjsonWriter('out.jsonl') as w:
+    w.write({'url': ..., 'title': ...})
+
+for chunk in iter_dataframes('out.parquet', chunksize=50000, columns=['title', 'price'], filters=time_filters(days=30)):
+    ...
+"""
+import json
+import os
+from itertools import islice
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+
+NDJSON_SUFFIXES = ('.jsonl', '.ndjson')
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+
+# 各输出格式对应的文件扩展名
+FORMAT_SUFFIX = {'json': '.json', 'ndjson': '.jsonl', 'parquet': '.parquet'}
+
+# 写 Parquet 时每个 row group 的行数，分页读取时只解码覆盖所需范围的 row group
+PARQUET_ROW_GROUP_SIZE = 50000
+
+# 抓取记录的列与类型
+SCRAPE_COLUMNS = ['url', 'title', 'price', 'origin', 'shop_name', 'scrape_time', 'raw_text_snippet', 'keyword']
+CATEGORY_COLUMNS = ('origin', 'keyword')
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt
+    lower = path.lower()
+    if lower.endswith(NDJSON_SUFFIXES):
+        return 'ndjson'
+    if lower.endswith(PARQUET_SUFFIXES):
+        return 'parquet'
+    return 'json'
+
+
+class NdjsonTailer:
+    """增量读取正在写入的 NDJSON：记住已读到的字节位置，每次只读取新追加的完整行。"""
+
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        self.offset = offset
+        self.count = 0
+
+    def read_new(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        if os.path.getsize(self.path) < self.offset:
+            # 文件被重写（例如任务重新开始），从头读取
+            self.offset = 0
+            self.count = 0
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        # 末尾没有换行的半行留到下次读取
+        end = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        self.offset += end
+        self.count += len(records)
+        return records
+
+
+class NdjsonCounter:
+    """增量统计正在写入的 NDJSON 的记录数：记住已数到的字节位置，每次只读取新追加的完整行，不解析 JSON。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.count = 0
+
+    def update(self) -> int:
+        if not os.path.exists(self.path):
+            return self.count
+        if os.path.getsize(self.path) < self.offset:
+            # 文件被重写（例如任务重新开始），从头统计
+            self.offset = 0
+            self.count = 0
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # 写了一半的末行留到下次统计
+                    break
+                self.offset += len(line)
+                if line.strip():
+                    self.count += 1
+        return self.count
+
+
+class NdjsonWriter:
+    """逐条追加写入 NDJSON，每条记录写入后立即 flush，便于下游边写边读。"""
+
+    def __init__(self, path: str, mode: str = 'w'):
+        self.path = path
+        self.count = 0
+        self._f = open(path, mode, encoding='utf-8')
+
+    def write(self, record: dict):
+        self._f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._f.flush()
+        self.count += 1
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """统一列类型：price 转浮点、scrape_time 转（UTC、无时区）时间戳、origin/keyword 转分类列。"""
+    df = df.copy()
+    if 'price' in df.columns:
+        df['price'] = pd.to_numeric(df['price'], errors='coerce').astype('float64')
+    if 'scrape_time' in df.columns:
+        df['scrape_time'] = pd.to_datetime(df['scrape_time'], errors='coerce', utc=True).dt.tz_convert(None)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).astype('category')
+    return df
+
+
+def _scrape_schema():
+    import pyarrow as pa
+    categorical = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('url', pa.string()),
+        ('title', pa.string()),
+        ('price', pa.float64()),
+        ('origin', categorical),
+        ('shop_name', pa.string()),
+        ('scrape_time', pa.timestamp('us')),
+        ('raw_text_snippet', pa.string()),
+        ('keyword', categorical),
+    ])
+
+
+class ParquetRecordWriter:
+    """按抓取记录的固定 schema 写 Parquet，每次 write_records 写入一个 row group（例如每个关键词一批）。"""
+
+    def __init__(self, path: str):
+        import pyarrow.parquet as pq
+        self.path = path
+        self.count = 0
+        self._schema = _scrape_schema()
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+
+    def write_records(self, records: List[dict]):
+        import pyarrow as pa
+        if not records:
+            return
+        df = pd.DataFrame(records).reindex(columns=SCRAPE_COLUMNS)
+        df = typed_frame(df)
+        for col in ('url', 'title', 'shop_name', 'raw_text_snippet'):
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self.count += len(df)
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_dataframe(df: pd.DataFrame, path: str, fmt: Optional[str] = None):
+    """按格式写出 DataFrame（分析结果等列不固定的数据）。"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'parquet':
+        typed_frame(df).to_parquet(path, index=False, compression='zstd', row_group_size=PARQUET_ROW_GROUP_SIZE)
+    elif fmt == 'ndjson':
+        df.to_json(path, force_ascii=False, orient='records', lines=True, date_format='iso')
+    else:
+        df.to_json(path, force_ascii=False, orient='records', date_format='iso')
+
+
+def time_filters(days: Optional[int] = None, start=None, end=None, origins: Optional[List[str]] = None) -> List[tuple]:
+    """构造常用的过滤条件：最近 days 天 / [start, end] 日期区间 / 产地列表。"""
+    filters = []
+    if days is not None:
+        filters.append(('scrape_time', '>=', pd.Timestamp.now() - pd.Timedelta(days=days)))
+    if start is not None:
+        filters.append(('scrape_time', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('scrape_time', '<=', pd.Timestamp(end)))
+    if origins:
+        filters.append(('origin', 'in', list(origins)))
+    return filters
+
+
+_OPS = {
+    '==': lambda s, v: s == v,
+    '!=': lambda s, v: s != v,
+    '>': lambda s, v: s > v,
+    '>=': lambda s, v: s >= v,
+    '<': lambda s, v: s < v,
+    '<=': lambda s, v: s <= v,
+    'in': lambda s, v: s.isin(v),
+    'not in': lambda s, v: ~s.isin(v),
+}
+
+
+def apply_filters(df: pd.DataFrame, filters: Optional[List[tuple]]) -> pd.DataFrame:
+    """在 pandas 中执行与 Parquet 下推相同的过滤条件（用于 JSON/NDJSON）。"""
+    if not filters or df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if col == 'scrape_time':
+            series = pd.to_datetime(series, errors='coerce', utc=True).dt.tz_convert(None)
+        mask &= _OPS[op](series, value)
+    return df[mask]
+
+
+def _project(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    if columns is None:
+        return df
+    return df[[c for c in columns if c in df.columns]]
+
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[dict]:
+    """逐条读取记录。NDJSON 按行流式读取（跳过空行与写了一半的末行），JSON 数组整体读入。"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'ndjson':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    elif fmt == 'parquet':
+        for chunk in iter_dataframes(path, fmt='parquet'):
+            yield from chunk.to_dict(orient='records')
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def iter_dataframes(path: str, chunksize: int = 50000, fmt: Optional[str] = None, columns: Optional[List[str]] = None, filters: Optional[List[tuple]] = None) -> Iterator[pd.DataFrame]:
+    """按块读取为 DataFrame；Parquet 下推 columns/filters，JSON 数组无法流式解析，只产出一个块。"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'parquet':
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+        dataset = ds.dataset(path, format='parquet')
+        expr = pq.filters_to_expression(filters) if filters else None
+        names = [c for c in columns if c in dataset.schema.names] if columns is not None else None
+        for batch in dataset.to_batches(columns=names, filter=expr, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+    if fmt == 'ndjson':
+        batch = []
+        for record in iter_records(path, 'ndjson'):
+            batch.append(record)
+            if len(batch) >= chunksize:
+                yield _project(apply_filters(pd.DataFrame(batch), filters), columns)
+                batch = []
+        if batch:
+            yield _project(apply_filters(pd.DataFrame(batch), filters), columns)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield _project(apply_filters(pd.DataFrame(json.load(f)), filters), columns)
+
+
+def count_records(path: str, fmt: Optional[str] = None) -> int:
+    """记录条数：Parquet 读元数据，NDJSON 数行，JSON 数组需要整体解析。"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    if fmt == 'ndjson':
+        with open(path, 'rb') as f:
+            return sum(1 for line in f if line.strip())
+    with open(path, 'r', encoding='utf-8') as f:
+        return len(json.load(f))
+
+
+def read_page(path: str, offset: int = 0, limit: int = 100, fmt: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """读取从第 offset 条开始的 limit 条记录：Parquet 只解码覆盖该范围的 row group，NDJSON 逐行跳过，JSON 数组整体读入后切片。"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        names = [c for c in columns if c in pf.schema_arrow.names] if columns is not None else None
+        pieces = []
+        start = 0
+        for i in range(pf.num_row_groups):
+            n = pf.metadata.row_group(i).num_rows
+            if start + n > offset:
+                piece = pf.read_row_group(i, columns=names).to_pandas()
+                pieces.append(piece.iloc[max(offset - start, 0):offset + limit - start])
+            start += n
+            if start >= offset + limit:
+                break
+        if not pieces:
+            return pd.DataFrame(columns=names or pf.schema_arrow.names)
+        return pd.concat(pieces, ignore_index=True)
+    if fmt == 'ndjson':
+        return _project(pd.DataFrame(list(islice(iter_records(path, 'ndjson'), offset, offset + limit))), columns)
+    return _project(read_dataframe(path, fmt=fmt).iloc[offset:offset + limit].reset_index(drop=True), columns)
+
+
+def _ndjson_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso').encode('utf-8') if len(df) else b''
+
+
+def iter_ndjson_lines(path: str, offset: int = 0, limit: Optional[int] = None, fmt: Optional[str] = None, columns: Optional[List[str]] = None, batch_size: int = 1000) -> Iterator[bytes]:
+    """把第 offset 条起的 limit 条记录（limit 为空时到末尾）输出为 NDJSON 字节块，供接口流式返回。
+
+    NDJSON 未指定 columns 时原始行直接透传、不解析；Parquet 逐 row group 解码并跳过 offset 之前的 row group；
+    JSON 数组无法流式解析，整体读入后切片。每块最多 batch_size 条记录。
+    """
+    fmt = detect_format(path, fmt)
+    stop = None if limit is None else offset + limit
+    if fmt == 'ndjson':
+        with open(path, 'rb') as f:
+            batch = []
+            for line in islice((line for line in f if line.strip()), offset, stop):
+                if columns is not None or not line.endswith(b'\n'):
+                    # 需要裁剪列，或是末尾没有换行、可能写了一半的行
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if columns is not None:
+                        record = {c: record[c] for c in columns if c in record}
+                    line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+                batch.append(line)
+                if len(batch) >= batch_size:
+                    yield b''.join(batch)
+                    batch = []
+            if batch:
+                yield b''.join(batch)
+        return
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        names = [c for c in columns if c in pf.schema_arrow.names] if columns is not None else None
+        start = 0
+        for i in range(pf.num_row_groups):
+            n = pf.metadata.row_group(i).num_rows
+            if stop is not None and start >= stop:
+                break
+            if start + n > offset:
+                table = pf.read_row_group(i, columns=names)
+                lo = max(offset - start, 0)
+                hi = n if stop is None else min(stop - start, n)
+                for batch in table.slice(lo, hi - lo).to_batches(max_chunksize=batch_size):
+                    yield _ndjson_bytes(batch.to_pandas())
+            start += n
+        return
+    df = read_dataframe(path, fmt=fmt, columns=columns).iloc[offset:stop]
+    for lo in range(0, len(df), batch_size):
+        yield _ndjson_bytes(df.iloc[lo:lo + batch_size])
+
+
+def read_dataframe(path: str, fmt: Optional[str] = None, columns: Optional[List[str]] = None, filters: Optional[List[tuple]] = None) -> pd.DataFrame:
+    if detect_format(path, fmt) == 'parquet':
+        if columns is not None:
+            # 与 JSON/NDJSON 一致：忽略文件中不存在的列
+            import pyarrow.parquet as pq
+            names = pq.read_schema(path).names
+            columns = [c for c in columns if c in names]
+        return pd.read_parquet(path, columns=columns, filters=filters or None)
+    chunks = list(iter_dataframes(path, fmt=fmt, columns=columns, filters=filters))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
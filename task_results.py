@@ -0,0 +1,78 @@
+"""
+任务结果目录：列出 data 目录下各任务的抓取与分析输出（app.py 写出的 {task_id}_scrape.* / {task_id}_analysis.*）。
+
+状态判断：
+- running：抓取输出旁仍有 .ckpt 检查点（抓取进行中或中断待续）
+- scraped：抓取完成，分析结果尚未生成
+- done：分析结果已生成
+
+用法示例：
+for task in list_tasks('data', limit=20):
+    print(task.task_id, task.status, task.result_path)
+"""
+import os
+from typing import List, Optional
+
+from checkpoint import checkpoint_path_for
+from record_io import NDJSON_SUFFIXES, PARQUET_SUFFIXES
+
+
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+
+RESULT_SUFFIXES = ('.json',) + NDJSON_SUFFIXES + PARQUET_SUFFIXES
+SCRAPE_MARKER = '_scrape'
+ANALYSIS_MARKER = '_analysis'
+
+
+class TaskResult:
+    def __init__(self, task_id: str, scrape_path: Optional[str] = None, analysis_path: Optional[str] = None, updated_at: float = 0.0):
+        self.task_id = task_id
+        self.scrape_path = scrape_path
+        self.analysis_path = analysis_path
+        self.updated_at = updated_at
+
+    @property
+    def status(self) -> str:
+        if self.analysis_path:
+            return 'done'
+        if self.scrape_path and os.path.exists(checkpoint_path_for(self.scrape_path)):
+            return 'running'
+        return 'scraped'
+
+    @property
+    def result_path(self) -> Optional[str]:
+        """优先返回分析结果，尚未分析时返回抓取输出（抓取中可能尚未创建）。"""
+        return self.analysis_path or self.scrape_path
+
+
+def _split_name(name: str):
+    stem, ext = os.path.splitext(name)
+    if ext.lower() not in RESULT_SUFFIXES:
+        return None, None
+    for marker, kind in ((SCRAPE_MARKER, 'scrape'), (ANALYSIS_MARKER, 'analysis')):
+        if stem.endswith(marker):
+            return stem[:-len(marker)], kind
+    return None, None
+
+
+def list_tasks(data_dir: str = DATA_DIR, limit: Optional[int] = None) -> List[TaskResult]:
+    """按最近更新时间倒序列出任务，只读取目录项，不解析文件内容。"""
+    if not os.path.isdir(data_dir):
+        return []
+    tasks = {}
+    with os.scandir(data_dir) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            name, path = entry.name, entry.path
+            if name.endswith('.ckpt'):
+                # 单关键词 JSON 输出在抓取结束时才写出，抓取中只有检查点
+                name, path = name[:-len('.ckpt')], path[:-len('.ckpt')]
+            task_id, kind = _split_name(name)
+            if task_id is None:
+                continue
+            task = tasks.setdefault(task_id, TaskResult(task_id))
+            setattr(task, f'{kind}_path', path)
+            task.updated_at = max(task.updated_at, entry.stat().st_mtime)
+    ordered = sorted(tasks.values(), key=lambda t: t.updated_at, reverse=True)
+    return ordered[:limit] if limit is not None else ordered
@@ -1,11 +1,17 @@
 """
-Celery tasks: 包含 scrape_and_analyze 异步任务，调用 playwright_scraper.py 的 run 接口与 analysis_agent。
+Celery tasks: 包含 scrape_and_analyze / scrape_batch_and_analyze 异步任务，调用 playwright_scraper.py 的 run 接口与 analysis_agent。
 Redis 必须运行，并且环境变量 CELERY_BROKER_URL/CELERY_RESULT_BACKEND 应配置为 redis URL（示例 redis://localhost:6379/0）。
 """
 import os
 from celery import Celery
-from playwright_scraper import run as pw_run
+from celery.signals import worker_process_shutdown
+from playwright_scraper import run as pw_run, run_batch as pw_run_batch
 from analysis_agent import SimpleAnalysisAgent
+from browser_pool import get_browser_pool, shutdown_browser_pool
+from fetch_cache import get_fetch_cache
+from proxy_pool import get_proxy_pool
+from history_store import get_history_store
+from progress import ProgressReporter
 
 CELERY_BROKER = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1')
@@ -13,16 +19,58 @@ CELERY_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1')
 celery_app = Celery('agentscope_tasks', broker=CELERY_BROKER, backend=CELERY_BACKEND)
 
 
-@celery_app.task(bind=True)
+# 抓取任务使用 acks_late：worker 中途被杀时任务会被重新投递，
+# 并以 resume=True 从输出文件旁的 .ckpt 检查点继续，不必重做已完成的链接
+# 设置 PROXY_POOL_FILE 时使用进程内共享的代理池（健康检查在 worker 的事件循环中运行），否则使用请求中的 proxy
+# 抓取结果同时导入历史库（data/history.db），重复导入同一记录会被忽略，任务重试是安全的
+# 任务进度（发现/抓取/失败的链接数与各阶段耗时）通过 Redis pub/sub 发布到 progress:{celery_id}，app.py 的 /events 与 /ws 转发给前端
+
+
+@worker_process_shutdown.connect
+def _close_browser_pool(**kwargs):
+    # worker 子进程退出时关闭常驻浏览器
+    shutdown_browser_pool()
+
+
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True)
 def scrape_and_analyze(self, keyword, start_date, end_date, out_file, analysis_out, max_pages=5, proxy=None, cookies=None):
-    # 调用 playwright scraper
-    pw_run(keyword, start_date, end_date, out_file, max_pages=max_pages, proxy=proxy, cookies=cookies, headless=True)
-    # 分析
-    agent = SimpleAnalysisAgent(out_file)
-    agent.load()
-    agent.filter_time_window(days=30)
-    agent.extract_features()
-    agent.competitor_match()
-    agent.score()
+    progress = ProgressReporter(self.request.id)
+    try:
+        # 调用 playwright scraper（复用 worker 进程内的浏览器池）
+        pw_run(keyword, start_date, end_date, out_file, max_pages=max_pages, proxy=proxy, cookies=cookies, headless=True, pool=get_browser_pool(), cache=get_fetch_cache(), resume=True, proxy_pool=get_proxy_pool(), progress=progress)
+        result = _ingest_and_analyze(self.request.id, out_file, analysis_out, progress)
+    except Exception as e:
+        progress.error(e)
+        raise
+    progress.done(result)
+    return result
+
+
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def scrape_batch_and_analyze(self, keywords, start_date, end_date, out_file, analysis_out, max_pages=5, proxy=None, cookies=None, concurrency=1):
+    progress = ProgressReporter(self.request.id)
+    try:
+        # 批量关键词共享同一个浏览器 context，跨关键词去重详情 URL，结果写入同一个输出文件
+        counts = pw_run_batch(keywords, start_date, end_date, out_file, max_pages=max_pages, proxy=proxy, cookies=cookies, headless=True, concurrency=concurrency, pool=get_browser_pool(), cache=get_fetch_cache(), resume=True, proxy_pool=get_proxy_pool(), progress=progress)
+        result = _ingest_and_analyze(self.request.id, out_file, analysis_out, progress)
+    except Exception as e:
+        progress.error(e)
+        raise
+    result['counts'] = counts
+    progress.done(result)
+    return result
+
+
+def _ingest_and_analyze(task_id, out_file, analysis_out, progress):
+    with progress.stage('ingest'):
+        ingested = get_history_store().ingest_file(out_file, task_id=task_id)
+    with progress.stage('analyze'):
+        analyze(out_file, analysis_out)
+    return {'analysis': analysis_out, 'ingested': ingested}
+
+
+def analyze(in_file, analysis_out, days=30):
+    agent = SimpleAnalysisAgent(in_file)
+    # 时间窗口在读取时过滤
+    agent.pipeline().where(days=days).features().group().score().collect()
     agent.to_json(analysis_out)
-    return {'analysis': analysis_out}
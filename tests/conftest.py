@@ -0,0 +1,151 @@
+"""
+测试公共部分：把仓库根目录加入 sys.path，并提供不启动 Chromium 的假 Playwright 对象。
+
+FakeSite 记录每个 URL 的页面内容与失败次数，FakePage/FakeContext/FakePool 只实现抓取流程用到的方法；
+fake_clock 把模块中的 time.time / time.monotonic 换成可手动推进的时钟。
+"""
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiter, RetryPolicy  # noqa: E402
+from readiness import ReadinessWaiter  # noqa: E402
+from resource_blocker import ResourceBlocker  # noqa: E402
+
+
+class FakeSite:
+    def __init__(self, search_links=None):
+        self.search_links = list(search_links or [])
+        # URL 子串 -> 剩余的失败次数（goto 抛异常）
+        self.failures = {}
+        self.visits = []
+        self.active = 0
+        self.max_active = 0
+
+    def fail(self, marker: str, times: int = 1):
+        self.failures[marker] = times
+
+    def detail(self, url: str) -> dict:
+        return {'fields': {'title': [f'商品 {url.rsplit("/", 1)[-1]}'], 'price': ['¥12.5']}, 'document_title': '', 'body': '产地：新疆阿克苏'}
+
+
+class FakePage:
+    def __init__(self, site: FakeSite):
+        self.site = site
+        self.url = 'about:blank'
+        self.closed = False
+
+    async def goto(self, url, timeout=None, wait_until=None):
+        self.site.visits.append(url)
+        self.site.active += 1
+        self.site.max_active = max(self.site.max_active, self.site.active)
+        try:
+            # 让出事件循环，使并发的页面能同时处于打开状态
+            await asyncio.sleep(0.01)
+            for marker, left in self.site.failures.items():
+                if marker in url and left > 0:
+                    self.site.failures[marker] = left - 1
+                    raise RuntimeError(f'goto failed: {url}')
+            self.url = url
+            return None
+        finally:
+            self.site.active -= 1
+
+    async def wait_for_selector(self, *args, **kwargs):
+        return None
+
+    async def wait_for_load_state(self, *args, **kwargs):
+        return None
+
+    async def wait_for_function(self, *args, **kwargs):
+        return None
+
+    async def eval_on_selector_all(self, selector, js, arg=None):
+        return list(self.site.search_links) if '/search/' in self.url else []
+
+    async def query_selector(self, selector):
+        return None
+
+    async def evaluate(self, js, arg=None):
+        if isinstance(arg, dict):
+            return self.site.detail(self.url)
+        return 0
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, site: FakeSite):
+        self.site = site
+        self.pages = 0
+
+    async def new_page(self):
+        self.pages += 1
+        return FakePage(self.site)
+
+
+class FakePool:
+    def __init__(self, site: FakeSite):
+        self.site = site
+        self.contexts = 0
+
+    @asynccontextmanager
+    async def context(self, proxy=None):
+        self.contexts += 1
+        yield FakeContext(self.site)
+
+    async def close(self):
+        pass
+
+
+class FakeClock:
+    """可手动推进的时钟，代替 time.time / time.monotonic。"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """返回 patch(module, attr='time')：把 module.time.<attr> 换成同一个 FakeClock 并返回该时钟。"""
+    clock = FakeClock()
+
+    def patch(module, attr: str = 'time') -> FakeClock:
+        monkeypatch.setattr(module.time, attr, clock)
+        return clock
+    return patch
+
+
+@pytest.fixture
+def site():
+    return FakeSite()
+
+
+@pytest.fixture
+def scrape_kwargs(site):
+    """iter_keyword_results/fetch_details 通用参数：假浏览器池、不拦截资源、不限速、失败不重试。"""
+    return {
+        'pool': FakePool(site),
+        'blocker': ResourceBlocker(blocked_types=[], blocked_patterns=[]),
+        'waiter': ReadinessWaiter(),
+        'limiter': RateLimiter(rate=1000, burst=1000, max_rate=1000),
+        'retry': RetryPolicy(max_attempts=1),
+    }
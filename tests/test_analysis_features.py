@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+import analysis_agent
+from analysis_agent import SimpleAnalysisAgent
+
+
+def _agent(n=40):
+    agent = SimpleAnalysisAgent('unused.json')
+    agent.df = pd.DataFrame({
+        'url': [f'https://shop.example.com/goods/{i}' for i in range(n)],
+        'keyword': ['核桃' if i % 3 else '红枣' for i in range(n)],
+        'raw_text_snippet': [('新疆阿克苏手剥核桃 产地：新疆' if i % 2 else '河北赞皇大枣') * (i % 4 + 1) for i in range(n)],
+        'title': ['t'] * n,
+    })
+    return agent
+
+
+def test_small_inputs_stay_in_process(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError('process pool must not start below PARALLEL_MIN_TEXT_CHARS')
+
+    monkeypatch.setattr(analysis_agent, 'ProcessPoolExecutor', no_pool)
+    agent = _agent()
+    agent.extract_features(workers=4)
+    assert agent.df['kw_核桃'].sum() > 0
+
+
+@pytest.mark.parametrize('partition_by', ['url', 'keyword'])
+def test_parallel_features_match_serial(monkeypatch, partition_by):
+    serial = _agent()
+    serial.extract_features()
+    monkeypatch.setattr(analysis_agent, 'PARALLEL_MIN_TEXT_CHARS', 0)
+    parallel = _agent()
+    parallel.extract_features(workers=2, partition_by=partition_by)
+    pd.testing.assert_frame_equal(parallel.df, serial.df, check_dtype=False)
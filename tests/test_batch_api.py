@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+
+import backend.main as backend_main
+import backend.tasks as backend_tasks
+
+
+class _Sent:
+    id = 'celery-1'
+
+
+def test_backend_batch_rejects_blank_keywords_and_strips(monkeypatch):
+    sent = []
+    monkeypatch.setattr(backend_main.celery, 'send_task', lambda name, args: sent.append((name, args)) or _Sent())
+    client = TestClient(backend_main.app)
+    body = {'start_date': '2025-08-01', 'end_date': '2025-08-31'}
+    assert client.post('/scrape/batch', json=dict(body, keywords=[])).status_code == 400
+    assert client.post('/scrape/batch', json=dict(body, keywords=['  ', ''])).status_code == 400
+    assert sent == []
+    resp = client.post('/scrape/batch', json=dict(body, keywords=[' 核桃 ', '', '红枣']))
+    assert resp.status_code == 200
+    assert resp.json()['keywords'] == ['核桃', '红枣']
+    assert sent[0][1][0] == ['核桃', '红枣']
+
+
+def test_batch_output_is_named_per_task(monkeypatch):
+    outs = []
+    monkeypatch.setattr(backend_tasks, 'run_scrape_batch', lambda keywords, start, end, out, **kwargs: outs.append(out) or {})
+    monkeypatch.setattr(backend_tasks, 'get_browser_pool', lambda: None)
+    monkeypatch.setattr(backend_tasks, 'get_fetch_cache', lambda: None)
+    monkeypatch.setattr(backend_tasks, 'get_proxy_pool', lambda: None)
+    monkeypatch.setattr(backend_tasks, 'get_history_store', lambda: type('Store', (), {'ingest_file': lambda self, out, task_id=None: 0})())
+    backend_tasks.run_scrape_batch_task.apply(args=[['核桃', '红枣'], '2025-08-01', '2025-08-31'], task_id='task-a')
+    backend_tasks.run_scrape_batch_task.apply(args=[['枸杞', '坚果'], '2025-08-01', '2025-08-31'], task_id='task-b')
+    assert outs[0] != outs[1]
+    assert 'task-a' in outs[0] and 'task-b' in outs[1]
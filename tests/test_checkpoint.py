@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from checkpoint import ScrapeCheckpoint
+from conftest import FakePage
+from playwright_scraper import collect_candidate_links, iter_keyword_results
+
+
+LINKS = [f'https://shop.example.com/goods/{i}' for i in range(3)]
+
+
+def _scrape(checkpoint, scrape_kwargs, keywords=('核桃',)):
+    async def main():
+        out = []
+        async for keyword, records in iter_keyword_results(list(keywords), '2024-01-01', '2024-12-31', checkpoint=checkpoint, **scrape_kwargs):
+            out.append((keyword, records))
+        return out
+    return asyncio.run(main())
+
+
+def test_frontier_records_and_failures_survive_resume(tmp_path):
+    path = str(tmp_path / 'out.json.ckpt')
+    ckpt = ScrapeCheckpoint(path)
+    ckpt.set_frontier('核桃', LINKS)
+    ckpt.set_frontier('红枣', [])
+    ckpt.add_record({'url': LINKS[0] + '?utm_source=feed', 'title': 'a'})
+    ckpt.add_failed(LINKS[1], 'timeout')
+    ckpt.add_failed_search('枸杞', 'search page failed')
+    ckpt.close()
+    # 模拟崩溃时写了一半的最后一行
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "record", "rec')
+
+    ckpt = ScrapeCheckpoint(path, resume=True)
+    assert ckpt.frontier('核桃') == LINKS
+    # 搜索成功但没有链接是 []，未搜索过是 None
+    assert ckpt.frontier('红枣') == []
+    assert ckpt.frontier('枸杞') is None
+    assert ckpt.get(LINKS[0])['title'] == 'a'
+    assert ckpt.failed() == [LINKS[1]]
+    assert ckpt.failed_searches() == ['枸杞']
+    ckpt.add_record({'url': LINKS[1], 'title': 'b'})
+    ckpt.close()
+
+    with open(path, encoding='utf-8') as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    # 残缺行之后的新事件单独成行
+    assert json.loads(lines[-1])['record']['title'] == 'b'
+    assert ScrapeCheckpoint(path, resume=True).failed() == []
+
+
+def test_collect_candidate_links_returns_none_when_search_fails(site, scrape_kwargs):
+    site.fail('/search/', times=1)
+    links = asyncio.run(collect_candidate_links(FakePage(site), '核桃', waiter=scrape_kwargs['waiter'], limiter=scrape_kwargs['limiter'], retry=scrape_kwargs['retry']))
+    assert links is None
+
+
+def test_failed_search_is_retried_on_resume(tmp_path, site, scrape_kwargs):
+    path = str(tmp_path / 'out.json.ckpt')
+    site.search_links = LINKS
+    site.fail('/search/', times=1)
+
+    ckpt = ScrapeCheckpoint(path)
+    assert _scrape(ckpt, scrape_kwargs) == [('核桃', [])]
+    # 失败的搜索不能保存为空 frontier，否则 resume 会把该关键词当作已完成
+    assert ckpt.frontier('核桃') is None
+    assert ckpt.failed_searches() == ['核桃']
+    ckpt.close()
+
+    ckpt = ScrapeCheckpoint(path, resume=True)
+    assert ckpt.failed_searches() == ['核桃']
+    [(keyword, records)] = _scrape(ckpt, scrape_kwargs)
+    assert [r['url'] for r in records] == LINKS
+    assert ckpt.frontier('核桃') == LINKS
+    assert ckpt.failed_searches() == []
+    ckpt.close()
@@ -0,0 +1,49 @@
+import pytest
+
+import fetch_cache
+from fetch_cache import FetchCache, normalize_url
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(fetch_cache)
+
+
+def test_normalize_url_drops_tracking_params_and_fragment():
+    a = normalize_url('HTTPS://Shop.Example.com/goods/1/?b=2&utm_source=x&a=1#top')
+    b = normalize_url('https://shop.example.com/goods/1?a=1&b=2&spm=abc')
+    assert a == b == 'https://shop.example.com/goods/1?a=1&b=2'
+
+
+def test_hit_until_ttl_then_miss(tmp_path, clock):
+    cache = FetchCache(str(tmp_path / 'cache.db'), ttl_seconds=60)
+    cache.put('https://shop.example.com/goods/1?utm_source=feed', {'title': '核桃'})
+    clock.now += 59
+    assert cache.get('https://shop.example.com/goods/1') == {'title': '核桃'}
+    clock.now += 2
+    assert cache.get('https://shop.example.com/goods/1') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_evict_keeps_most_recently_accessed(tmp_path, clock):
+    cache = FetchCache(str(tmp_path / 'cache.db'), ttl_seconds=3600, max_entries=2)
+    for i in range(3):
+        clock.now += 1
+        cache.put(f'https://shop.example.com/goods/{i}', {'i': i})
+    clock.now += 1
+    # 访问最早写入的 0，使 1 成为最久未访问的条目
+    assert cache.get('https://shop.example.com/goods/0') == {'i': 0}
+    cache.evict()
+    assert cache.get('https://shop.example.com/goods/1') is None
+    assert cache.get('https://shop.example.com/goods/0') == {'i': 0}
+    assert cache.get('https://shop.example.com/goods/2') == {'i': 2}
+    cache.close()
+
+
+def test_entries_survive_reopen(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    cache = FetchCache(path)
+    cache.put('https://shop.example.com/goods/1', {'title': 'x'})
+    cache.close()
+    assert FetchCache(path).get('https://shop.example.com/goods/1') == {'title': 'x'}
@@ -0,0 +1,63 @@
+import asyncio
+
+from conftest import FakeContext
+from playwright_scraper import fetch_details
+from rate_limiter import RetryPolicy
+
+
+def test_results_keep_link_order_and_page_pool_is_bounded(site, scrape_kwargs):
+    links = [f'https://shop.example.com/goods/{i}' for i in range(10)]
+    context = FakeContext(site)
+    records = asyncio.run(fetch_details(context, links, concurrency=3, waiter=scrape_kwargs['waiter'], limiter=scrape_kwargs['limiter'], retry=scrape_kwargs['retry']))
+    assert [r['url'] for r in records] == links
+    assert records[0]['title'] == '商品 0'
+    assert records[0]['price'] == 12.5
+    assert context.pages == 3
+    assert 1 < site.max_active <= 3
+
+
+def test_failed_link_is_skipped_without_affecting_others(site, scrape_kwargs):
+    links = [f'https://shop.example.com/goods/{i}' for i in range(4)]
+    site.fail('/goods/2', times=5)
+    seen = []
+    records = asyncio.run(fetch_details(FakeContext(site), links, concurrency=2, waiter=scrape_kwargs['waiter'], limiter=scrape_kwargs['limiter'], retry=scrape_kwargs['retry'], on_record=lambda r: seen.append(r['url'])))
+    assert [r['url'] for r in records] == [links[0], links[1], links[3]]
+    assert sorted(seen) == sorted([links[0], links[1], links[3]])
+
+
+class FlakyContext(FakeContext):
+    """前 failures 次 new_page() 抛异常（例如 Chromium 启动失败、context 已关闭）。"""
+
+    def __init__(self, site, failures):
+        super().__init__(site)
+        self.failures = failures
+
+    async def new_page(self):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError('browser failed to launch')
+        return await super().new_page()
+
+
+def test_new_page_failure_does_not_hang(site, scrape_kwargs):
+    links = [f'https://shop.example.com/goods/{i}' for i in range(5)]
+    failed = []
+
+    class Checkpoint:
+        def get(self, url):
+            return None
+
+        def add_failed(self, url, error):
+            failed.append((url, error))
+
+    records = asyncio.run(asyncio.wait_for(fetch_details(FlakyContext(site, failures=100), links, concurrency=2, waiter=scrape_kwargs['waiter'], limiter=scrape_kwargs['limiter'], retry=scrape_kwargs['retry'], checkpoint=Checkpoint()), timeout=5))
+    assert records == []
+    assert [url for url, _ in failed] == links
+    assert all('browser failed to launch' in error for _, error in failed)
+
+
+def test_pages_are_reopened_after_new_page_failures(site, scrape_kwargs):
+    links = [f'https://shop.example.com/goods/{i}' for i in range(5)]
+    retry = RetryPolicy(max_attempts=3, base_delay=0)
+    records = asyncio.run(asyncio.wait_for(fetch_details(FlakyContext(site, failures=2), links, concurrency=2, waiter=scrape_kwargs['waiter'], limiter=scrape_kwargs['limiter'], retry=retry), timeout=5))
+    assert [r['url'] for r in records] == links
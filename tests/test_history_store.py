@@ -0,0 +1,42 @@
+from history_store import HistoryStore
+
+
+def _record(url, scrape_time, keyword='核桃', price=12.5, origin='新疆维吾尔自治区'):
+    return {'url': url, 'keyword': keyword, 'title': 't', 'price': price, 'origin': origin, 'shop_name': 's', 'scrape_time': scrape_time, 'raw_text_snippet': ''}
+
+
+def test_ingest_skips_same_url_and_scrape_time(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    records = [
+        _record('https://shop.example.com/goods/1', '2025-08-01T10:00:00'),
+        _record('https://shop.example.com/goods/1?utm_source=feed', '2025-08-01T10:00:00'),
+        _record('https://shop.example.com/goods/1', '2025-08-02T10:00:00'),
+        {'url': 'https://shop.example.com/goods/2', 'scrape_time': None},
+    ]
+    assert store.ingest(records, task_id='a') == 2
+    # 重复导入（例如断点续传后再次入库）不会重复计数
+    assert store.ingest(records, task_id='b') == 0
+    assert store.count() == 2
+    store.close()
+
+
+def test_query_by_window_keyword_and_url(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.ingest([
+        _record('https://shop.example.com/goods/1', '2025-07-31T23:59:59'),
+        _record('https://shop.example.com/goods/1', '2025-08-01T08:00:00', price=10),
+        _record('https://shop.example.com/goods/2', '2025-08-01T23:00:00', keyword='红枣', origin='河北省'),
+        _record('https://shop.example.com/goods/3', '2025-08-02T00:00:00'),
+    ])
+    # 只给日期的 end 包含当天全天
+    df = store.query(start='2025-08-01', end='2025-08-01')
+    assert df['url'].tolist() == ['https://shop.example.com/goods/1', 'https://shop.example.com/goods/2']
+    assert store.query(keywords=['红枣'])['origin'].tolist() == ['河北省']
+    assert store.query(url='https://shop.example.com/goods/1/?spm=x', columns=['price'])['price'].tolist() == [12.5, 10.0]
+    assert store.keywords() == ['核桃', '红枣']
+    lo, hi = store.time_range()
+    assert (str(lo), str(hi)) == ('2025-07-31 23:59:59', '2025-08-02 00:00:00')
+
+    stats = store.daily_stats(keywords=['核桃'])
+    assert stats['count'].tolist() == [1, 1, 1]
+    store.close()
@@ -0,0 +1,105 @@
+import json
+import time
+
+import pytest
+import redis
+
+import progress
+from progress import ProgressReporter
+
+
+class SlowRedis:
+    """每次 pipeline.execute 耗时 delay 秒的假 Redis，记录发布的事件。"""
+
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.published = []
+        self.snapshots = {}
+
+    def pipeline(self, transaction=True):
+        return _Pipe(self)
+
+
+class _Pipe:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def publish(self, channel, message):
+        self.ops.append(('publish', channel, message))
+
+    def set(self, key, value, ex=None):
+        self.ops.append(('set', key, value))
+
+    def execute(self):
+        time.sleep(self.redis.delay)
+        if self.redis.fail:
+            raise redis.ConnectionError('unreachable')
+        for op, key, value in self.ops:
+            if op == 'publish':
+                self.redis.published.append(json.loads(value))
+            else:
+                self.redis.snapshots[key] = json.loads(value)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fakes = {}
+
+    def from_url(url, **kwargs):
+        return fakes[url]
+
+    monkeypatch.setattr(redis.Redis, 'from_url', from_url)
+    monkeypatch.setattr(progress, '_publishers', {})
+    return fakes
+
+
+def test_publish_does_not_wait_for_redis(fake_redis):
+    fake = fake_redis['redis://slow'] = SlowRedis(delay=0.05)
+    reporter = ProgressReporter('t1', redis_url='redis://slow', min_interval=0)
+    started = time.monotonic()
+    with reporter.stage('scrape'):
+        for i in range(20):
+            reporter.fetched(f'https://shop.example.com/goods/{i}')
+    # 22 个事件同步写入至少需要 1.1s，入队应远小于此
+    assert time.monotonic() - started < 0.3
+    assert reporter.flush(timeout=10)
+    reporter.done({'ok': True})
+    assert [e['event'] for e in fake.published][-1] == 'done'
+    assert len(fake.published) == 23
+    assert fake.snapshots['progress:t1:last']['counts']['fetched'] == 20
+
+
+def test_publishing_resumes_after_transient_error(fake_redis, monkeypatch, caplog):
+    monkeypatch.setattr(progress, 'PUBLISH_RETRY_SECONDS', 0.05)
+    fake = fake_redis['redis://flaky'] = SlowRedis(delay=0, fail=True)
+    reporter = ProgressReporter('t2', redis_url='redis://flaky', min_interval=0)
+    with caplog.at_level('WARNING', logger='progress'):
+        reporter.publish('stage', status='started')
+        assert reporter.flush(timeout=2)
+    assert 'progress publish to redis://flaky failed' in caplog.text
+    # 退避期间的事件直接丢弃
+    reporter.discovered('核桃', 3)
+    assert reporter.flush(timeout=2)
+    assert fake.published == []
+
+    fake.fail = False
+    time.sleep(0.1)
+    reporter.discovered('红枣', 2)
+    assert reporter.flush(timeout=2)
+    assert [e['keyword'] for e in fake.published] == ['红枣']
+    # 同一进程之后的任务照常发布
+    ProgressReporter('t3', redis_url='redis://flaky').done()
+    assert fake.snapshots['progress:t3:last']['event'] == 'done'
+
+
+def test_terminal_event_is_sent_during_backoff(fake_redis, monkeypatch):
+    monkeypatch.setattr(progress, 'PUBLISH_RETRY_SECONDS', 60)
+    fake = fake_redis['redis://blip'] = SlowRedis(delay=0, fail=True)
+    reporter = ProgressReporter('t4', redis_url='redis://blip')
+    reporter.publish('stage', status='started')
+    assert reporter.flush(timeout=2)
+    fake.fail = False
+    reporter.done()
+    assert [e['event'] for e in fake.published] == ['done']
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import proxy_pool
+from proxy_pool import ProxyPool
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(proxy_pool, 'monotonic')
+
+
+def _pool(tmp_path, lines, **kwargs):
+    path = tmp_path / 'proxies.txt'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return ProxyPool(str(path), check_url=None, **kwargs)
+
+
+def _state(pool, proxy):
+    return {s['proxy']: s['state'] for s in pool.stats()}[proxy]
+
+
+def test_unsupported_proxies_are_ignored_at_load(tmp_path):
+    pool = _pool(tmp_path, ['# comment', 'http://a:1', 'http://user:pw@b:2', 'socks5://c:3', 'socks4://d:4', 'socks5://u:p@e:5', 'f:6', 'http://a:1'])
+    assert pool.proxies == ['http://a:1', 'http://user:pw@b:2', 'socks5://c:3']
+
+
+def test_circuit_opens_after_threshold_and_half_opens_for_one_lease(tmp_path, clock):
+    pool = _pool(tmp_path, ['http://a:1'], failure_threshold=3, open_seconds=10, max_open_seconds=15, acquire_timeout=0)
+    proxy = 'http://a:1'
+    for _ in range(2):
+        pool.record(proxy, ok=False)
+    assert _state(pool, proxy) == 'closed'
+    pool.record(proxy, ok=False)
+    assert _state(pool, proxy) == 'open'
+    assert pool.get_proxy() is None
+
+    async def lease_twice():
+        async with pool.lease() as first:
+            # 半开状态只放行一个请求，第二个租用在 acquire_timeout 后放弃
+            with pytest.raises(RuntimeError):
+                async with pool.lease():
+                    pass
+            return first
+
+    clock.now += 10
+    assert _state(pool, proxy) == 'half-open'
+    assert asyncio.run(lease_twice()) == proxy
+
+    # 半开状态下失败：再次熔断，时长翻倍但不超过 max_open_seconds
+    pool.record(proxy, ok=False)
+    clock.now += 14
+    assert _state(pool, proxy) == 'open'
+    clock.now += 1
+    assert _state(pool, proxy) == 'half-open'
+    pool.record(proxy, ok=True, latency=0.2)
+    assert _state(pool, proxy) == 'closed'
+    assert pool.get_proxy() == proxy
+
+
+def test_weighted_choice_prefers_fast_reliable_proxy(tmp_path, clock):
+    pool = _pool(tmp_path, ['http://fast:1', 'http://slow:2'])
+    pool.record('http://fast:1', ok=True, latency=0.1)
+    pool.record('http://slow:2', ok=True, latency=2.0)
+    pool.record('http://slow:2', ok=False)
+    picks = [pool.get_proxy() for _ in range(200)]
+    assert picks.count('http://fast:1') > 150
+
+
+def test_no_health_check_without_check_url(tmp_path, monkeypatch):
+    pool = _pool(tmp_path, ['http://a:1'])
+
+    def fail(*args, **kwargs):
+        raise AssertionError('health check must not send requests without check_url')
+
+    monkeypatch.setattr(proxy_pool.httpx, 'AsyncClient', fail)
+    asyncio.run(pool.check_all())
+    assert pool.stats()[0]['samples'] == 0
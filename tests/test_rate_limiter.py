@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from rate_limiter import RateLimiter, RetryPolicy, looks_blocked
+
+
+def test_aimd_adapts_per_domain_within_bounds():
+    limiter = RateLimiter(rate=2, burst=1, min_rate=0.5, max_rate=2.5, increase=0.2, error_factor=0.8, block_factor=0.5)
+    a, b = 'https://a.example.com/x', 'https://b.example.com/y'
+    for _ in range(5):
+        limiter.record(a, ok=True)
+    assert limiter.rate(a) == pytest.approx(2.5)
+    limiter.record(a, ok=False)
+    assert limiter.rate(a) == pytest.approx(2.0)
+    limiter.record(a, ok=False, blocked=True)
+    assert limiter.rate(a) == pytest.approx(1.0)
+    for _ in range(5):
+        limiter.record(a, ok=False, blocked=True)
+    assert limiter.rate('a.example.com') == pytest.approx(0.5)
+    # 其它域名的速率不受影响
+    assert limiter.rate(b) == pytest.approx(2.0)
+    assert limiter.summary()['a.example.com'] == {'ok': 5, 'error': 1, 'blocked': 6, 'rate': 0.5}
+
+
+def test_acquire_waits_once_burst_is_spent():
+    limiter = RateLimiter(rate=20, burst=2)
+    url = 'https://a.example.com/x'
+
+    async def main():
+        started = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire(url)
+        await limiter.acquire('https://b.example.com/y')
+        return time.monotonic() - started
+
+    # 突发 2 个立即放行，之后每个间隔 1/20 秒；另一个域名不排队
+    assert 0.08 <= asyncio.run(main()) < 0.5
+
+
+def test_retry_delay_is_bounded_full_jitter():
+    retry = RetryPolicy(max_attempts=0, base_delay=1.0, max_delay=5.0)
+    assert retry.max_attempts == 1
+    for attempt, cap in [(1, 1.0), (2, 2.0), (3, 4.0), (10, 5.0)]:
+        delays = [retry.delay(attempt) for _ in range(200)]
+        assert all(0 <= d <= cap for d in delays)
+        assert max(delays) > cap / 2
+
+
+def test_looks_blocked_detects_captcha_pages():
+    assert looks_blocked('', '请完成安全验证')
+    assert looks_blocked('Please verify you are human')
+    assert not looks_blocked(None, '新疆阿克苏核桃 500g')
@@ -0,0 +1,19 @@
+from record_io import NdjsonCounter, count_records
+
+
+def test_ndjson_counter_reads_only_appended_lines(tmp_path):
+    path = tmp_path / 'r.jsonl'
+    path.write_bytes(b'{"i": 0}\n\n{"i": 1}\n{"i": 2')
+    counter = NdjsonCounter(str(path))
+    # 写了一半的末行不计入
+    assert counter.update() == 2
+    offset = counter.offset
+    with open(path, 'ab') as f:
+        f.write(b'}\n{"i": 3}\n')
+    assert counter.update() == 4 == count_records(str(path))
+    assert counter.offset > offset
+    assert counter.update() == 4
+
+    # 文件被重写后从头统计
+    path.write_bytes(b'{"i": 0}\n')
+    assert counter.update() == 1
@@ -0,0 +1,57 @@
+import importlib
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+RECORDS = [{'url': f'https://shop.example.com/goods/{i}', 'title': f'商品 {i}', 'price': i} for i in range(10)]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # app 在导入时挂载相对路径 frontend/，结果文件从相对路径 data/ 读取
+    (tmp_path / 'frontend').mkdir()
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'r.jsonl').write_text(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in RECORDS), encoding='utf-8')
+    (tmp_path / 'data' / 'r.json').write_text(json.dumps(RECORDS, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module('app')
+    return TestClient(app.app)
+
+
+def _lines(resp):
+    return [json.loads(line) for line in resp.text.splitlines() if line]
+
+
+def test_pagination_and_field_selection(client):
+    resp = client.get('/result/r.jsonl', params={'offset': 3, 'limit': 2, 'fields': 'url,price'})
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('application/x-ndjson')
+    assert _lines(resp) == [{'url': RECORDS[i]['url'], 'price': i} for i in (3, 4)]
+    # JSON 数组文件同样可以分页
+    assert [r['title'] for r in _lines(client.get('/result/r.json', params={'offset': 8}))] == ['商品 8', '商品 9']
+    assert client.get('/result/r.jsonl', params={'offset': -1}).status_code == 400
+    assert client.get('/result/..%2Fr.jsonl').status_code == 404
+
+
+def test_etag_returns_304_until_file_or_params_change(client, tmp_path):
+    first = client.get('/result/r.jsonl', params={'limit': 5})
+    etag = first.headers['etag']
+    assert client.get('/result/r.jsonl', params={'limit': 5}, headers={'If-None-Match': etag}).status_code == 304
+    # 参数不同的请求 ETag 不同
+    assert client.get('/result/r.jsonl', params={'limit': 6}, headers={'If-None-Match': etag}).status_code == 200
+    with open(tmp_path / 'data' / 'r.jsonl', 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'url': 'https://shop.example.com/goods/10'}) + '\n')
+    resp = client.get('/result/r.jsonl', params={'limit': 5}, headers={'If-None-Match': etag})
+    assert resp.status_code == 200 and resp.headers['etag'] != etag
+
+
+def test_paged_result_is_compressed_when_accepted(client):
+    resp = client.get('/result/r.jsonl', params={'limit': 10}, headers={'Accept-Encoding': 'gzip;q=1, br;q=0'})
+    assert resp.headers['content-encoding'] == 'gzip'
+    # TestClient 已自动解压
+    assert len(_lines(resp)) == 10
+    raw = client.get('/result/r.jsonl', params={'limit': 10}, headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in raw.headers
+    assert _lines(raw) == RECORDS
@@ -0,0 +1,198 @@
+"""
+价格/产地抽取：预编译、一次扫描，产地统一为省级行政区全称（与 dashboard_app.PROVINCE_COORDS 的键一致）。
+
+- 价格与产地标签（产地/原产地/发货地）合并为一个预编译正则，从左到右只扫描一遍正文：
+  找到其中一类结果后剩余部分只查找另一类，高优先级的结果（"产地："标签 与 "¥" 价格）都找到后立即停止
+- 省份简称、地级市及常见产区（例如 阿克苏、临安）作为别名构建字符前缀树（trie），
+  前缀树再编译为一个正则（公共前缀合并为分组、可选的后续部分贪婪匹配），
+  扫描在正则引擎内完成并取最长匹配，例如 "新疆阿克苏" -> "新疆维吾尔自治区"
+- 容易与普通词混淆的地名（开封、日照、三明、安康、来宾、白银、阿里巴巴 的 阿里 等）不作为别名
+
+与原 extract_origin_from_text / extract_price_from_text 的规则对应关系：
+- 价格：优先 "¥/￥ 数字"，其次 "数字 元"，整段文本只有数字时直接作为价格
+- 产地：优先 产地/原产地 标签，其次 发货地 标签；标签值中的地名映射为省份全称，
+  没有可识别地名时保留标签原值（例如 "美国"）；没有标签时取正文中第一个地名对应的省份
+
+基准见 bench_extract.py。
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# 省级行政区全称 -> 别名（简称、地级市、常见产区县市）；全称本身也会加入别名
+PROVINCE_ALIASES: Dict[str, List[str]] = {
+    '北京市': ['北京'],
+    '天津市': ['天津'],
+    '上海市': ['上海'],
+    '重庆市': ['重庆', '万州', '涪陵'],
+    '河北省': ['河北', '石家庄', '唐山', '秦皇岛', '邯郸', '邢台', '保定', '张家口', '承德', '沧州', '廊坊', '衡水', '迁西', '涉县'],
+    '山西省': ['山西', '太原', '大同', '阳泉', '晋城', '朔州', '晋中', '运城', '忻州', '临汾', '吕梁', '汾阳', '左权'],
+    '辽宁省': ['辽宁', '沈阳', '大连', '鞍山', '抚顺', '本溪', '丹东', '锦州', '营口', '阜新', '辽阳', '盘锦', '铁岭', '葫芦岛'],
+    '吉林省': ['吉林', '长春', '四平', '辽源', '通化', '白山', '松原', '白城', '延边'],
+    '黑龙江省': ['黑龙江', '哈尔滨', '齐齐哈尔', '鸡西', '鹤岗', '双鸭山', '大庆', '伊春', '佳木斯', '七台河', '牡丹江', '黑河', '绥化', '大兴安岭'],
+    '江苏省': ['江苏', '南京', '无锡', '徐州', '常州', '苏州', '南通', '连云港', '淮安', '盐城', '扬州', '镇江', '泰州', '宿迁'],
+    '浙江省': ['浙江', '杭州', '宁波', '温州', '嘉兴', '湖州', '绍兴', '金华', '衢州', '舟山', '台州', '丽水', '临安'],
+    '安徽省': ['安徽', '合肥', '芜湖', '蚌埠', '淮南', '马鞍山', '淮北', '铜陵', '安庆', '黄山', '滁州', '阜阳', '宿州', '六安', '亳州', '池州', '宣城', '宁国'],
+    '福建省': ['福建', '福州', '厦门', '莆田', '泉州', '漳州', '南平', '龙岩', '宁德'],
+    '江西省': ['江西', '南昌', '景德镇', '萍乡', '九江', '新余', '鹰潭', '赣州', '吉安', '宜春', '抚州', '上饶'],
+    '山东省': ['山东', '济南', '青岛', '淄博', '枣庄', '东营', '烟台', '潍坊', '济宁', '泰安', '威海', '临沂', '德州', '聊城', '滨州', '菏泽'],
+    '河南省': ['河南', '郑州', '洛阳', '平顶山', '安阳', '鹤壁', '新乡', '焦作', '濮阳', '许昌', '漯河', '三门峡', '南阳', '商丘', '信阳', '周口', '驻马店', '济源'],
+    '湖北省': ['湖北', '武汉', '黄石', '十堰', '宜昌', '襄阳', '鄂州', '荆门', '孝感', '荆州', '黄冈', '咸宁', '随州', '恩施', '神农架'],
+    '湖南省': ['湖南', '长沙', '株洲', '湘潭', '衡阳', '邵阳', '岳阳', '常德', '张家界', '益阳', '郴州', '永州', '怀化', '娄底', '湘西'],
+    '广东省': ['广东', '广州', '深圳', '珠海', '汕头', '佛山', '韶关', '湛江', '肇庆', '江门', '茂名', '惠州', '梅州', '汕尾', '河源', '阳江', '清远', '东莞', '潮州', '揭阳', '云浮'],
+    '海南省': ['海南', '海口', '三亚', '儋州', '三沙'],
+    '四川省': ['四川', '成都', '自贡', '攀枝花', '泸州', '德阳', '绵阳', '广元', '遂宁', '内江', '乐山', '南充', '眉山', '宜宾', '广安', '达州', '雅安', '巴中', '资阳', '阿坝', '甘孜', '凉山'],
+    '贵州省': ['贵州', '贵阳', '遵义', '六盘水', '安顺', '毕节', '铜仁', '黔东南', '黔南', '黔西南'],
+    '云南省': ['云南', '昆明', '曲靖', '玉溪', '保山', '昭通', '丽江', '普洱', '临沧', '楚雄', '红河', '文山', '西双版纳', '大理', '德宏', '怒江', '迪庆', '漾濞', '凤庆'],
+    '陕西省': ['陕西', '西安', '铜川', '宝鸡', '咸阳', '渭南', '延安', '汉中', '榆林', '商洛'],
+    '甘肃省': ['甘肃', '兰州', '嘉峪关', '金昌', '天水', '武威', '张掖', '平凉', '酒泉', '庆阳', '定西', '陇南', '临夏', '甘南'],
+    '青海省': ['青海', '西宁', '海东', '格尔木', '玉树', '果洛'],
+    '内蒙古自治区': ['内蒙古', '内蒙', '呼和浩特', '包头', '乌海', '赤峰', '通辽', '鄂尔多斯', '呼伦贝尔', '巴彦淖尔', '乌兰察布', '兴安盟', '锡林郭勒', '阿拉善'],
+    '广西壮族自治区': ['广西', '南宁', '柳州', '桂林', '梧州', '防城港', '钦州', '贵港', '玉林', '百色', '贺州', '河池', '崇左'],
+    '西藏自治区': ['西藏', '拉萨', '日喀则', '昌都', '林芝', '那曲'],
+    '宁夏回族自治区': ['宁夏', '银川', '石嘴山', '吴忠', '固原', '中卫'],
+    '新疆维吾尔自治区': ['新疆', '乌鲁木齐', '克拉玛依', '吐鲁番', '哈密', '昌吉', '博尔塔拉', '巴音郭楞', '库尔勒', '阿克苏', '克孜勒苏', '喀什', '和田', '伊犁', '塔城', '阿勒泰', '石河子', '叶城', '温宿', '若羌', '且末'],
+}
+
+PROVINCES = list(PROVINCE_ALIASES)
+
+# 价格与产地标签合并扫描；origin_label 组区分 产地/原产地 与 发货地。
+# 标签值在空白/标点/价格符号/数字处结束，避免吞掉同一行后面的价格或其它标签。
+# 开头的字符类先行断言让正则引擎快速跳过不可能匹配的位置（多选分支本身没有前缀优化）
+_ORIGIN_PART = r'(?P<origin_label>原产地|产地|发货地)[:：]\s*(?P<origin>[^\s，。;；,、¥￥0-9]+)'
+_YEN_PART = r'[¥￥]\s*(?P<yen>[0-9]+(?:\.[0-9]{1,2})?)'
+_YUAN_PART = r'(?P<yuan>[0-9]+(?:\.[0-9]{1,2})?)\s*元'
+_SCAN = re.compile(r'(?=[原产发¥￥0-9])(?:' + '|'.join([_ORIGIN_PART, _YEN_PART, _YUAN_PART]) + ')')
+# 已经找到其中一类结果后，剩余部分只需查找另一类（仍然从当前位置继续，整段文本只扫描一遍）
+_SCAN_ORIGIN = re.compile(_ORIGIN_PART)
+_SCAN_YEN = re.compile(_YEN_PART)
+_SCAN_YEN_OR_YUAN = re.compile(r'(?=[¥￥0-9])(?:' + _YEN_PART + '|' + _YUAN_PART + ')')
+_BARE_PRICE = re.compile(r'\s*([0-9]+(?:\.[0-9]{1,2})?)\s*')
+
+
+def _build_trie(aliases: Dict[str, str]) -> dict:
+    trie = {}
+    for alias in aliases:
+        node = trie
+        for ch in alias:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    return trie
+
+
+def _trie_pattern(node: dict) -> str:
+    """把前缀树编译为正则：同一前缀的分支合并为一个分组，别名可在此结束时后续部分为可选（贪婪，取最长匹配）。"""
+    terminal = '' in node
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if terminal:
+        return ('(?:' + body + ')?') if len(branches) == 1 and len(body) > 1 else body + '?'
+    return body
+
+
+def _alias_table() -> Dict[str, str]:
+    table = {}
+    for province, aliases in PROVINCE_ALIASES.items():
+        for alias in [province] + aliases:
+            table[alias] = province
+    return table
+
+
+ALIAS_TO_PROVINCE = _alias_table()
+_TRIE = _build_trie(ALIAS_TO_PROVINCE)
+PLACE_RE = re.compile(_trie_pattern(_TRIE))
+
+
+def find_provinces(text: str) -> List[str]:
+    """按出现顺序返回文本中所有地名对应的省份全称（从左到右、不重叠、每处取最长别名）。"""
+    if not text:
+        return []
+    return [ALIAS_TO_PROVINCE[m.group(0)] for m in PLACE_RE.finditer(text)]
+
+
+def normalize_province(text: str) -> str:
+    """文本中第一个地名对应的省份全称，没有可识别地名时返回 ''。"""
+    if not text:
+        return ''
+    m = PLACE_RE.search(text)
+    return ALIAS_TO_PROVINCE[m.group(0)] if m else ''
+
+
+def normalize_origin(value) -> str:
+    """产地字段标准化：能识别出地名时返回省份全称，否则返回去掉首尾空白的原值（例如 "美国"、"进口"）。"""
+    if not isinstance(value, str):
+        return ''
+    value = value.strip()
+    return normalize_province(value) or value
+
+
+def normalize_origins(values):
+    """pandas Series 版本：只对去重后的取值做标准化再映射回去（产地取值种类远少于行数）。"""
+    values = values.astype(object).fillna('').astype(str)
+    uniques = values.unique()
+    return values.map(dict(zip(uniques, map(normalize_origin, uniques))))
+
+
+def _scan(text: str, want_origin: bool) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    # 返回 (价格文本, 产地/原产地 标签值, 发货地 标签值)；需要的最高优先级结果都找到后停止扫描
+    yen = yuan = label_origin = ship_origin = None
+    pattern = _SCAN if want_origin else _SCAN_YEN_OR_YUAN
+    pos = 0
+    while True:
+        m = pattern.search(text, pos)
+        if m is None:
+            break
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == 'origin':
+            if m.group('origin_label') == '发货地':
+                if ship_origin is None:
+                    ship_origin = m.group('origin')
+            elif label_origin is None:
+                label_origin = m.group('origin')
+        elif kind == 'yen':
+            if yen is None:
+                yen = m.group('yen')
+        elif yuan is None:
+            yuan = m.group('yuan')
+        have_origin = label_origin is not None or not want_origin
+        if yen is not None and have_origin:
+            break
+        if yen is not None:
+            pattern = _SCAN_ORIGIN
+        elif have_origin:
+            pattern = _SCAN_YEN if yuan is not None else _SCAN_YEN_OR_YUAN
+    return (yen if yen is not None else yuan), label_origin, ship_origin
+
+
+def extract_price_origin(text: str) -> Tuple[Optional[float], str]:
+    """一次扫描同时抽取价格与产地，返回 (price, origin)。"""
+    if not text:
+        return None, ''
+    bare = _BARE_PRICE.fullmatch(text)
+    if bare:
+        return float(bare.group(1)), ''
+    price, label_origin, ship_origin = _scan(text, want_origin=True)
+    raw_origin = label_origin if label_origin is not None else ship_origin
+    if raw_origin is not None:
+        origin = normalize_origin(raw_origin)
+    else:
+        # 没有产地标签时取正文中第一个地名
+        origin = normalize_province(text)
+    return (float(price) if price is not None else None), origin
+
+
+def extract_price(text: str) -> Optional[float]:
+    if not text:
+        return None
+    bare = _BARE_PRICE.fullmatch(text)
+    if bare:
+        return float(bare.group(1))
+    price = _scan(text, want_origin=False)[0]
+    return float(price) if price is not None else None
+
+
+def extract_origin(text: str) -> str:
+    return extract_price_origin(text)[1]